@@ -9,19 +9,48 @@ __version__ = "0.1.0"
 __author__ = "Francisco Breno"
 __email__ = "fbreno.dev@gmail.com"
 
-# Facilitadores de importação para usuários do pacote
-from src.models import BaseEvent, ExecEvent, MoveEvent, SelfEvent
-from src.parsers import LogParser
-from src.etl import (
-    EventValidator,
-    ValidationReport,
-    SQLiteLoader,
-    SessionDetector,
-    Session
-)
-from src.metrics import MetricsEngine, MetricResult
-from src.exporters import XESExporter, export_to_xes
-from src.process_mining import ProcessAnalyzer, ProcessAnalysisResult
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Apenas para IDEs/type checkers; em runtime os nomes vêm de __getattr__
+    from .models import BaseEvent, ExecEvent, MoveEvent, SelfEvent
+    from .parsers import LogParser
+    from .etl import EventValidator, ValidationReport, SQLiteLoader, SessionDetector, Session
+    from .metrics import MetricsEngine, MetricResult
+    from .exporters import XESExporter, export_to_xes
+    from .process_mining import ProcessAnalyzer, ProcessAnalysisResult
+
+# Facilitadores de importação para usuários do pacote.
+# Carregados sob demanda (PEP 562): importar um subpacote (ex.: src.models)
+# não arrasta exportador XES, process mining, loader e engine de métricas.
+_LAZY = {
+    "BaseEvent": "src.models",
+    "ExecEvent": "src.models",
+    "MoveEvent": "src.models",
+    "SelfEvent": "src.models",
+    "LogParser": "src.parsers",
+    "EventValidator": "src.etl",
+    "ValidationReport": "src.etl",
+    "SQLiteLoader": "src.etl",
+    "SessionDetector": "src.etl",
+    "Session": "src.etl",
+    "MetricsEngine": "src.metrics",
+    "MetricResult": "src.metrics",
+    "XESExporter": "src.exporters",
+    "export_to_xes": "src.exporters",
+    "ProcessAnalyzer": "src.process_mining",
+    "ProcessAnalysisResult": "src.process_mining",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "__version__",
@@ -14,6 +14,8 @@ import structlog
 from flask import Flask
 from pathlib import Path
 
+from src.etl.connection import get_connection, close_connections
+
 logger = structlog.get_logger()
 
 # Carrega variáveis de ambiente do arquivo .env
@@ -50,6 +52,13 @@ def create_app(db_path: str) -> Flask:
     
     app.config['SECRET_KEY'] = secret_key
     
+    # Cache das páginas de leitura (invalidado após POSTs e pelo TTL)
+    from src.dashboard.cache import init_cache
+    init_cache(app, ttl=float(os.getenv('TKO_DASHBOARD_CACHE_TTL', '60')))
+    
+    # Conexões SQLite em cache vivem só durante a requisição
+    init_db_connections(app)
+    
     # Registra rotas
     from src.dashboard import routes
     routes.register_routes(app)
@@ -59,11 +68,21 @@ def create_app(db_path: str) -> Flask:
     return app
 
 
+def init_db_connections(app: Flask) -> None:
+    """
+    Fecha as conexões em cache da thread ao fim de cada requisição.
+    
+    Sem isso, cada thread do servidor (waitress) manteria suas conexões
+    abertas indefinidamente.
+    """
+    @app.teardown_appcontext
+    def _close_db_connections(exception=None):
+        close_connections()
+
+
 def get_db_connection(app: Flask) -> sqlite3.Connection:
-    """Cria conexão com banco de dados."""
-    conn = sqlite3.connect(app.config['DB_PATH'])
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Obtém a conexão (em cache na thread) com o banco de dados."""
+    return get_connection(app.config['DB_PATH'])
 
 
 def run_server(db_path: str, host: str = '127.0.0.1', port: int = 5000, debug: bool = True):
@@ -74,7 +93,8 @@ def run_server(db_path: str, host: str = '127.0.0.1', port: int = 5000, debug: b
         db_path: Caminho para banco SQLite
         host: Host para bind
         port: Porta do servidor
-        debug: Modo debug
+        debug: Modo debug (servidor de desenvolvimento do Flask); se False,
+            usa waitress quando instalado
     """
     app = create_app(db_path)
     
@@ -91,4 +111,20 @@ def run_server(db_path: str, host: str = '127.0.0.1', port: int = 5000, debug: b
     print(f"  - http://{host}:{port}/task/<task_id>")
     print(f"\nPressione Ctrl+C para parar o servidor\n")
     
-    app.run(host=host, port=port, debug=debug)
+    if debug:
+        app.run(host=host, port=port, debug=True)
+        return
+    
+    # Fora do modo debug, usa um servidor WSGI de produção multi-thread;
+    # cada requisição usa a conexão SQLite da sua thread (src.etl.connection,
+    # fechada no teardown) e o WAL permite leituras concorrentes
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("[run_server] - waitress not installed, using Flask development server")
+        app.run(host=host, port=port, debug=False)
+        return
+    
+    threads = int(os.getenv('TKO_DASHBOARD_THREADS', '8'))
+    logger.info("[run_server] - starting_waitress", threads=threads)
+    serve(app, host=host, port=port, threads=threads, connection_limit=1000)
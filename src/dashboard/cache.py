@@ -0,0 +1,127 @@
+"""
+Cache em memória (TTL) para as páginas de leitura do dashboard.
+
+As páginas de cohort, estudante e tarefa só mudam após uma importação ou
+limpeza do banco; o cache evita refazer as consultas e os gráficos Plotly a
+cada acesso. Qualquer requisição de escrita (POST) bem-sucedida invalida o
+cache inteiro; cargas feitas fora do app expiram pelo TTL.
+"""
+
+import time
+import threading
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional
+
+import structlog
+from flask import Flask, current_app, request, session
+
+logger = structlog.get_logger()
+
+_EXTENSION_KEY = "tko_view_cache"
+
+
+class TTLCache:
+    """
+    Cache chave -> valor com expiração por tempo e tamanho máximo.
+
+    Thread-safe (o servidor de desenvolvimento do Flask atende requisições
+    em threads). Ao atingir maxsize, descarta a entrada mais antiga.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        """
+        Args:
+            maxsize: Número máximo de entradas
+            ttl: Tempo de vida de cada entrada, em segundos
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None se ausente/expirado."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena um valor, descartando a entrada mais antiga se cheio."""
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._data) >= self.maxsize:
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+def init_cache(app: Flask, maxsize: int = 1024, ttl: float = 60.0) -> TTLCache:
+    """
+    Anexa o cache ao app e registra a invalidação após escritas.
+
+    Args:
+        app: Aplicação Flask
+        maxsize: Número máximo de páginas em cache
+        ttl: Tempo de vida de cada página, em segundos
+
+    Returns:
+        Cache criado
+    """
+    cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    app.extensions[_EXTENSION_KEY] = cache
+
+    @app.after_request
+    def _bust_cache_after_write(response):
+        if request.method not in ("GET", "HEAD") and response.status_code < 400:
+            bust_cache(app)
+        return response
+
+    return cache
+
+
+def bust_cache(app: Optional[Flask] = None) -> None:
+    """Invalida todas as páginas em cache (ex.: após importar ou limpar dados)."""
+    app = app or current_app
+    cache = app.extensions.get(_EXTENSION_KEY)
+    if cache is not None:
+        cache.clear()
+        logger.debug("[bust_cache] - dashboard_cache_cleared")
+
+
+def cached_view(view: Callable) -> Callable:
+    """
+    Decorator que guarda o HTML renderizado por uma view GET.
+
+    A chave é endpoint + caminho com query string. Não usa o cache quando há
+    mensagens flash pendentes (a página as consumiria) e só armazena
+    respostas em texto; abort(404) e afins nunca são armazenados.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = current_app.extensions.get(_EXTENSION_KEY)
+        if cache is None or request.method != "GET" or session.get("_flashes"):
+            return view(*args, **kwargs)
+
+        key = (request.endpoint, request.full_path)
+        page = cache.get(key)
+        if page is None:
+            page = view(*args, **kwargs)
+            if isinstance(page, str):
+                cache.set(key, page)
+        return page
+
+    return wrapper
@@ -4,7 +4,6 @@ Rotas do dashboard Flask.
 
 import os
 import csv
-import sqlite3
 import structlog
 import plotly.graph_objects as go
 from pathlib import Path
@@ -13,15 +12,16 @@ from flask import Flask, render_template, jsonify, abort, current_app, request,
 
 from src.parsers.log_parser import LogParser
 from src.etl.loader import SQLiteLoader
+from src.etl.connection import get_connection, invalidate_connections
+from src.etl.init_db import clear_tables
+from src.dashboard.cache import cached_view
 
 logger = structlog.get_logger()
 
 
 def get_db():
-    """Obtém conexão com banco de dados."""
-    conn = sqlite3.connect(current_app.config['DB_PATH'])
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Obtém a conexão (em cache na thread) com o banco de dados."""
+    return get_connection(current_app.config['DB_PATH'])
 
 
 def has_events_in_database() -> bool:
@@ -33,7 +33,7 @@ def has_events_in_database() -> bool:
     """
     conn = get_db()
     count = conn.execute('SELECT COUNT(*) as count FROM events').fetchone()['count']
-    conn.close()
+    conn.release()
     return count > 0
 
 
@@ -41,6 +41,7 @@ def register_routes(app: Flask):
     """Registra todas as rotas no app Flask."""
     
     @app.route('/')
+    @cached_view
     def index():
         """Homepage com visão geral."""
         # Verificar se banco está vazio
@@ -58,12 +59,13 @@ def register_routes(app: Flask):
             'total_sessions': conn.execute('SELECT COUNT(*) as count FROM sessions').fetchone()['count'],
         }
         
-        conn.close()
+        conn.release()
         
         return render_template('index.html', stats=stats)
     
     
     @app.route('/cohort')
+    @cached_view
     def cohort_overview():
         """Visão geral do cohort com heatmap."""
         conn = get_db()
@@ -141,7 +143,7 @@ def register_routes(app: Flask):
         
         students_summary = conn.execute(summary_query).fetchall()
         
-        conn.close()
+        conn.release()
         
         return render_template(
             'cohort.html',
@@ -153,6 +155,7 @@ def register_routes(app: Flask):
     
     
     @app.route('/student/<student_hash>')
+    @cached_view
     def student_detail(student_hash: str):
         """Detalhes de um estudante específico."""
         conn = get_db()
@@ -164,7 +167,7 @@ def register_routes(app: Flask):
         ).fetchone()
         
         if check['count'] == 0:
-            conn.close()
+            conn.release()
             abort(404, description="Estudante não encontrado")
         
         # Busca eventos do estudante
@@ -269,7 +272,7 @@ def register_routes(app: Flask):
         
         timeline_html = fig.to_html(full_html=False, include_plotlyjs='cdn')
         
-        conn.close()
+        conn.release()
         
         return render_template(
             'student.html',
@@ -284,6 +287,7 @@ def register_routes(app: Flask):
     
     
     @app.route('/task/<task_id>')
+    @cached_view
     def task_analytics(task_id: str):
         """Análise agregada de uma tarefa."""
         conn = get_db()
@@ -295,7 +299,7 @@ def register_routes(app: Flask):
         ).fetchone()
         
         if check['count'] == 0:
-            conn.close()
+            conn.release()
             abort(404, description="Tarefa não encontrada")
         
         # Estatísticas da tarefa
@@ -356,7 +360,7 @@ def register_routes(app: Flask):
         
         students = conn.execute(students_query, (task_id,)).fetchall()
         
-        conn.close()
+        conn.release()
         
         return render_template(
             'task.html',
@@ -386,7 +390,7 @@ def register_routes(app: Flask):
         
         metrics = [dict(row) for row in rows]
         
-        conn.close()
+        conn.release()
         
         return jsonify(metrics)
     
@@ -427,12 +431,7 @@ def register_routes(app: Flask):
                 
                 # Se modo limpo, limpar banco de dados
                 if import_mode == 'clean':
-                    conn = get_db()
-                    conn.execute("DELETE FROM events")
-                    conn.execute("DELETE FROM metrics")
-                    conn.execute("DELETE FROM sessions")
-                    conn.commit()
-                    conn.close()
+                    clear_tables(get_db(), ("events", "metrics", "sessions"))
                     logger.info("Database cleared (clean mode)")
                     flash('Banco de dados limpo.', 'info')
                 
@@ -474,10 +473,7 @@ def register_routes(app: Flask):
                     logger.info("Loading CSV into database", csv=str(csv_path), db=current_app.config['DB_PATH'])
                     # Se modo limpo, limpar banco antes
                     if import_mode == 'clean':
-                        conn = get_db()
-                        conn.execute("DELETE FROM events")
-                        conn.commit()
-                        conn.close()
+                        clear_tables(get_db(), ("events",))
                         logger.info("[] - Database cleared before",
                                csv=str(csv_path), 
                                db=current_app.config['DB_PATH'],
@@ -591,29 +587,13 @@ def register_routes(app: Flask):
     def clear_database():
         """Limpa todas as tabelas do banco de dados."""
         try:
-            conn = get_db()
-            cursor = conn.cursor()
+            # Todas as tabelas em uma transação (desfeita se algum DELETE falhar)
+            for table in clear_tables(get_db()):
+                logger.info("Table cleared", table=table)
             
-            # Desabilitar foreign keys temporariamente
-            cursor.execute("PRAGMA foreign_keys = OFF")
-            
-            # Listar todas as tabelas
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            # Limpar cada tabela
-            for table in tables:
-                if table != 'sqlite_sequence':
-                    cursor.execute(f"DELETE FROM {table}")
-                    logger.info("Table cleared", table=table)
-            
-            # Reabilitar foreign keys
-            cursor.execute("PRAGMA foreign_keys = ON")
-            
-            conn.commit()
-            conn.close()
-            
-            # Limpar diretório data/
+            # Limpar diretório data/ (pode conter o próprio arquivo do banco:
+            # nenhuma thread deve continuar usando handles do arquivo apagado)
+            invalidate_connections(current_app.config['DB_PATH'])
             try:
                 import shutil
                 data_dir = Path("data")
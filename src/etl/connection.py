@@ -0,0 +1,145 @@
+"""
+Cache de conexões SQLite por thread.
+
+Evita o custo de abrir o arquivo, ler o schema e reaplicar PRAGMAs a cada
+chamada de leitura/escrita pontual (loader, sessões, dashboard). Cada thread
+mantém uma conexão por banco até close_connections() (no dashboard, ao fim
+de cada requisição); os chamadores usam release() para devolvê-la.
+"""
+
+import sqlite3
+import threading
+import structlog
+from pathlib import Path
+from typing import Dict, Union
+
+logger = structlog.get_logger()
+
+# PRAGMAs por conexão (journal_mode=WAL é persistente e aplicado por init_database)
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8192",
+)
+
+# Acima deste número de linhas gravadas, a carga trunca o arquivo -wal
+WAL_CHECKPOINT_MIN_ROWS = 50_000
+
+_local = threading.local()
+
+# Geração de cada banco: invalidate_connections() a incrementa e as conexões
+# em cache de gerações anteriores (em qualquer thread) são reabertas
+_generations: Dict[str, int] = {}
+_generations_lock = threading.Lock()
+
+
+class CachedConnection(sqlite3.Connection):
+    """
+    Conexão mantida em cache na thread.
+
+    release() devolve a conexão ao cache, desfazendo uma transação não
+    confirmada; close() fecha de fato e a remove do cache.
+    """
+
+    _cache: Dict[str, "CachedConnection"]
+    _cache_key: str
+    _generation: int
+
+    def release(self) -> None:
+        """Desfaz a transação pendente e mantém a conexão aberta para reuso."""
+        if self.in_transaction:
+            self.rollback()
+
+    def close(self) -> None:
+        super().close()
+        cache = getattr(self, "_cache", None)
+        if cache is not None and cache.get(self._cache_key) is self:
+            del cache[self._cache_key]
+
+
+def _thread_cache() -> Dict[str, CachedConnection]:
+    cache = getattr(_local, "connections", None)
+    if cache is None:
+        cache = _local.connections = {}
+    return cache
+
+
+def get_connection(db_path: Union[str, Path]) -> CachedConnection:
+    """
+    Retorna a conexão em cache da thread atual para o banco informado.
+
+    A conexão é criada na primeira chamada, com row_factory=sqlite3.Row e
+    PRAGMAs já aplicados. Aceita caminho de arquivo ou URI SQLite ("file:...").
+    Uma conexão de geração anterior (ver invalidate_connections) é fechada
+    e reaberta.
+
+    Args:
+        db_path: Caminho do banco SQLite
+
+    Returns:
+        Conexão aberta (compartilhada pelos chamadores da mesma thread)
+    """
+    key = str(db_path)
+    cache = _thread_cache()
+    generation = _generations.get(key, 0)
+    conn = cache.get(key)
+    if conn is not None and conn._generation != generation:
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = sqlite3.connect(
+            key,
+            uri=key.startswith("file:"),
+            check_same_thread=False,
+            factory=CachedConnection
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn._cache = cache
+        conn._cache_key = key
+        conn._generation = generation
+        cache[key] = conn
+        logger.debug("[get_connection] - connection_opened", db_path=key)
+    return conn
+
+
+def invalidate_connections(db_path: Union[str, Path]) -> None:
+    """
+    Invalida as conexões em cache do banco em todas as threads.
+
+    Deve ser chamada antes de apagar ou substituir o arquivo do banco: as
+    conexões da thread atual são fechadas na hora e as das demais threads
+    são reabertas no próximo get_connection.
+    """
+    key = str(db_path)
+    with _generations_lock:
+        _generations[key] = _generations.get(key, 0) + 1
+    conn = _thread_cache().get(key)
+    if conn is not None:
+        conn.close()
+    logger.debug("[invalidate_connections] - connections_invalidated", db_path=key)
+
+
+def checkpoint_wal(conn: sqlite3.Connection) -> None:
+    """
+    Aplica o WAL no banco e trunca o arquivo -wal.
+
+    Usado após cargas grandes para que o -wal não cresça indefinidamente e
+    deixe as leituras seguintes (dashboard) mais lentas. Sem WAL é no-op;
+    se houver leitores ativos o checkpoint é parcial, sem erro.
+    """
+    busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    logger.debug(
+        "[checkpoint_wal] - wal_checkpoint",
+        busy=busy,
+        wal_frames=wal_frames,
+        checkpointed=checkpointed
+    )
+
+
+def close_connections() -> None:
+    """Fecha todas as conexões em cache da thread atual."""
+    cache = _thread_cache()
+    for conn in list(cache.values()):
+        conn.close()
+    cache.clear()
@@ -0,0 +1,40 @@
+"""
+Hashes SHA256 memoizados usados na anonimização e na geração de IDs.
+
+O mesmo student_id (e os mesmos eventos, em recargas) é hasheado
+repetidamente entre loader e detector de sessões; o cache evita recalcular.
+"""
+
+import hashlib
+from functools import lru_cache
+
+
+@lru_cache(maxsize=8192)
+def sha256_hex(value: str) -> str:
+    """
+    Retorna o hexdigest SHA256 de uma string (codificada em UTF-8).
+    
+    Args:
+        value: Texto a ser hasheado
+    
+    Returns:
+        Hash SHA256 em hexadecimal (64 caracteres)
+    """
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=2048)
+def sha256_short(value: str) -> str:
+    """
+    Prefixo de 8 caracteres do SHA256 (hash curto de student_id).
+    
+    Usado pelo detector de sessões e pelo motor de métricas, que gravam só o
+    prefixo; o loader grava o hash completo (sha256_hex).
+    
+    Args:
+        value: Texto a ser hasheado
+    
+    Returns:
+        Primeiros 8 caracteres do hexdigest SHA256
+    """
+    return sha256_hex(value)[:8]
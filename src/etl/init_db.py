@@ -8,29 +8,49 @@ import os
 import sqlite3
 import structlog
 from pathlib import Path
+from typing import Iterable, List, Optional
 
 logger = structlog.get_logger()
 
 
-def init_database(db_path: str = "./data/src.db") -> None:
+def _fast_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Desliga as garantias de durabilidade do SQLite (uso exclusivo em testes).
+    
+    Sem fsync e com journal em memória, o banco não sobrevive a uma queda
+    do processo - aceitável apenas para bancos descartáveis de teste.
+    """
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def init_database(db_path: str = "./data/src.db", fast: bool = False) -> None:
     """
     Inicializa banco de dados SQLite com schema completo.
     
     Args:
-        db_path: Caminho do arquivo de banco de dados
+        db_path: Caminho do arquivo de banco de dados (ou URI SQLite "file:...")
+        fast: Se True, usa pragmas sem durabilidade no lugar do WAL.
+            Somente para testes.
         
     Raises:
         sqlite3.Error: Se houver erro na criação do banco
     """
-    db_path = Path(db_path)
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+    is_uri = str(db_path).startswith("file:")
+    if not is_uri:
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
     
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, uri=is_uri)
     cursor = conn.cursor()
     
-    # Habilitar foreign keys e WAL mode
+    # Habilitar foreign keys e WAL mode (ou pragmas rápidos em testes)
     cursor.execute("PRAGMA foreign_keys = ON")
-    cursor.execute("PRAGMA journal_mode = WAL")
+    if fast:
+        _fast_pragmas(conn)
+    else:
+        cursor.execute("PRAGMA journal_mode = WAL")
     
     # Schema SQLite
     cursor.executescript("""
@@ -48,12 +68,20 @@ def init_database(db_path: str = "./data/src.db") -> None:
             metadata TEXT,
             created_at TEXT DEFAULT (datetime('now'))
         );
+        -- Índices compostos seguindo os filtros/ordenações das consultas:
+        -- (case_id[, task_id]) ORDER BY timestamp (loader, exportador XES),
+        -- student_hash ORDER BY timestamp (timeline) e task_id com
+        -- DISTINCT/GROUP BY student_hash (dashboard de tarefas)
         CREATE INDEX IF NOT EXISTS idx_events_case_timestamp ON events(case_id, timestamp);
-        CREATE INDEX IF NOT EXISTS idx_events_student ON events(student_hash);
-        CREATE INDEX IF NOT EXISTS idx_events_task ON events(task_id);
+        CREATE INDEX IF NOT EXISTS idx_events_case_task_ts ON events(case_id, task_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_events_student_ts ON events(student_hash, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_events_task_student ON events(task_id, student_hash);
         CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
-        CREATE INDEX IF NOT EXISTS idx_events_session ON events(session_id);
-        CREATE INDEX IF NOT EXISTS idx_events_activity ON events(activity);
+        -- Índices de coluna única substituídos pelos compostos (ou sem consultas)
+        DROP INDEX IF EXISTS idx_events_student;
+        DROP INDEX IF EXISTS idx_events_task;
+        DROP INDEX IF EXISTS idx_events_session;
+        DROP INDEX IF EXISTS idx_events_activity;
         
         -- Sessions
         CREATE TABLE IF NOT EXISTS sessions (
@@ -169,6 +197,50 @@ def init_database(db_path: str = "./data/src.db") -> None:
     )
 
 
+def clear_tables(conn: sqlite3.Connection, tables: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Esvazia tabelas do banco em uma única transação.
+    
+    Em caso de erro a transação é desfeita antes de relançar a exceção, de
+    modo que a conexão (possivelmente em cache e reutilizada pela thread)
+    nunca fica com uma escrita pendente segurando o lock do banco. As foreign
+    keys são desligadas durante a limpeza e restauradas ao estado anterior.
+    
+    Args:
+        conn: Conexão aberta (ex.: get_connection)
+        tables: Tabelas a esvaziar; None esvazia todas as tabelas do schema
+        
+    Returns:
+        Tabelas esvaziadas
+        
+    Raises:
+        sqlite3.Error: Se algum DELETE falhar (nada é removido)
+    """
+    if tables is None:
+        tables = [
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name != 'sqlite_sequence'"
+            )
+        ]
+    else:
+        tables = list(tables)
+    
+    # PRAGMA foreign_keys só tem efeito fora de transação
+    if conn.in_transaction:
+        conn.rollback()
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        with conn:
+            for table in tables:
+                conn.execute(f"DELETE FROM {table}")
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {int(foreign_keys)}")
+    
+    logger.info("[clear_tables] - tables_cleared", tables=tables)
+    return tables
+
+
 if __name__ == "__main__":
     db_path = os.getenv("TKO_DB_PATH", "./data/src.db")
     init_database(db_path)
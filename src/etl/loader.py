@@ -11,13 +11,142 @@ import sqlite3
 import hashlib
 import structlog
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
 from src.models import BaseEvent, ExecEvent, MoveEvent, SelfEvent
+from .connection import get_connection
+from .hashing import sha256_hex
+from .session_detector import SessionDetector, INSERT_SESSION_SQL
+from .writer import WriterThread, WriterError
 
 logger = structlog.get_logger()
 
 
+def _metadata_serializer() -> Callable[[Dict[str, Any]], str]:
+    """
+    Escolhe o serializador do metadata JSON.
+    
+    orjson (extra opcional "fast") é bem mais rápido que json.dumps; sem ele,
+    usa json da stdlib com os mesmos separadores compactos, gerando o mesmo
+    texto.
+    """
+    try:
+        import orjson
+    except ImportError:
+        def dumps(metadata: Dict[str, Any]) -> str:
+            return json.dumps(metadata, ensure_ascii=False, separators=(',', ':'))
+    else:
+        def dumps(metadata: Dict[str, Any]) -> str:
+            return orjson.dumps(metadata).decode('utf-8')
+    return dumps
+
+
+_dumps_metadata = _metadata_serializer()
+
+# Ajustes de conexão para carga em massa: com WAL (init_db), synchronous=NORMAL
+# só faz fsync no checkpoint; cache de 64 MiB, temporários em memória e mmap
+_BULK_LOAD_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+
+_INSERT_EVENT_SQL = """
+    INSERT OR IGNORE INTO events (
+        id, case_id, student_hash, task_id, activity,
+        event_type, timestamp, duration_seconds,
+        session_id, metadata
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _event_id(case_id: str, timestamp_iso: str, task_id: str, type_name: str) -> str:
+    """ID determinístico de evento: "evt_" + 16 primeiros hex do SHA256 da chave."""
+    key = f"{case_id}|{timestamp_iso}|{task_id}|{type_name}"
+    # Só 8 bytes viram hex (16 chars), sem gerar o hexdigest completo
+    return f"evt_{hashlib.sha256(key.encode()).digest()[:8].hex()}"
+
+
+# Activity name (convenção pm4py) por tipo de evento
+_ACTIVITY_BY_TYPE = {
+    ExecEvent: "test_execution",
+    MoveEvent: "task_navigation",
+    SelfEvent: "self_assessment",
+}
+
+# Campos específicos de cada tipo de evento incluídos no metadata JSON
+_METADATA_BUILDER_BY_TYPE = {
+    ExecEvent: lambda e: {
+        "mode": e.mode,
+        "rate": e.rate,
+        "size": e.size,
+        "error": e.error
+    },
+    MoveEvent: lambda e: {
+        "action": e.action
+    },
+    SelfEvent: lambda e: {
+        "rate": e.rate,
+        "autonomy": e.autonomy,
+        "help_sources": e.get_help_sources(),
+        "has_help": e.has_any_help(),
+        "study_minutes": e.study_minutes
+    },
+}
+
+
+def _build_rows(
+    events: List[BaseEvent],
+    case_id: str,
+    student_hash: str,
+    session_id: Optional[str]
+) -> List[tuple]:
+    """
+    Converte eventos em tuplas para o INSERT em events.
+    
+    Laço único com as funções auxiliares resolvidas uma vez em variáveis
+    locais; o isoformat() do timestamp é calculado uma só vez por evento
+    (usado no ID e na coluna timestamp).
+    
+    Returns:
+        Tuplas: (id, case_id, student_hash, task_id, activity,
+                event_type, timestamp, duration_seconds,
+                session_id, metadata_json)
+    """
+    event_id = _event_id
+    activity_of = _ACTIVITY_BY_TYPE.get
+    metadata_of = _METADATA_BUILDER_BY_TYPE.get
+    dumps = _dumps_metadata
+    
+    rows = []
+    append = rows.append
+    for event in events:
+        event_cls = type(event)
+        type_name = event_cls.__name__
+        timestamp = event.timestamp.isoformat()
+        task_id = event.task_id
+        
+        metadata = {"version": event.version}
+        builder = metadata_of(event_cls)
+        if builder is not None:
+            metadata.update(builder(event))
+        
+        append((
+            event_id(case_id, timestamp, task_id, type_name),
+            case_id,
+            student_hash,
+            task_id,
+            activity_of(event_cls, "unknown_activity"),
+            type_name,
+            timestamp,
+            None,
+            session_id,
+            dumps(metadata)
+        ))
+    return rows
+
+
 class LoadError(Exception):
     """Erro durante carregamento de eventos no banco."""
     pass
@@ -46,6 +175,7 @@ class SQLiteLoader:
         self.batch_size = batch_size
         self.events_loaded = 0
         self.events_skipped = 0
+        self.sessions_loaded = 0
         
         if not self.db_path.exists():
             raise LoadError(f"Database not found: {self.db_path}")
@@ -88,58 +218,153 @@ class SQLiteLoader:
                    case_id=case_id,
                    student_hash=student_hash[:8])
         
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON")
+        # A thread escritora executa os INSERTs enquanto esta thread prepara
+        # o próximo batch; todos os batches formam uma única transação
+        # (BEGIN IMMEDIATE ... COMMIT), confirmada em writer.close()
+        writer = WriterThread(
+            self.db_path,
+            pragmas=("PRAGMA foreign_keys = ON", *_BULK_LOAD_PRAGMAS)
+        )
+        writer.start()
         
         try:
-            cursor = conn.cursor()
-            
             # Carrega em batches
             for i in range(0, len(events), self.batch_size):
                 batch = events[i:i + self.batch_size]
-                self._load_batch(cursor, batch, case_id, student_hash, session_id)
+                self._load_batch(writer, batch, case_id, student_hash, session_id)
+            
+            changes = writer.close()
+        except (sqlite3.Error, WriterError) as e:
+            raise LoadError(f"Database error: {e}") from e
+        finally:
+            # Falha antes do close(): descarta os batches e desfaz a transação
+            if writer.is_alive():
+                writer.abort()
+        
+        # Duplicatas (id já existente) são ignoradas pelo INSERT OR IGNORE
+        skipped = len(events) - changes
+        if skipped:
+            logger.debug("[SQLiteLoader.load_events] - events_skipped",
+                        skipped=skipped,
+                        reason="duplicate id")
+            self.events_skipped += skipped
+        
+        self.events_loaded = len(events)
+        
+        logger.info("[SQLiteLoader.load_events] - load_events_completed",
+                   loaded=self.events_loaded,
+                   skipped=self.events_skipped)
+        
+        return self.events_loaded
+    
+    def load_events_with_sessions(
+        self,
+        events: List[BaseEvent],
+        student_id: str,
+        detector: SessionDetector,
+        case_id: Optional[str] = None
+    ) -> int:
+        """
+        Detecta sessões e carrega eventos e sessões em uma única passada.
+        
+        Cada sessão produzida por detector.iter_sessions tem suas linhas de
+        evento montadas logo em seguida, já com o session_id preenchido; os
+        eventos não são percorridos de novo por save_sessions. Eventos e
+        sessões são gravados na mesma transação.
+        
+        Args:
+            events: Eventos validados, ordenados por timestamp
+            student_id: ID do estudante (será hasheado para anonimização)
+            detector: Detector que define o timeout das sessões
+            case_id: ID do caso (opcional, gerado se None)
             
-            conn.commit()
-            self.events_loaded = len(events)
+        Returns:
+            Número de eventos carregados; sessões inseridas ficam em
+            sessions_loaded
             
-            logger.info("[SQLiteLoader.load_events] - load_events_completed",
-                       loaded=self.events_loaded,
-                       skipped=self.events_skipped)
+        Raises:
+            SessionError: Se os eventos não estão ordenados
+            LoadError: Se houver erro fatal no carregamento
+        """
+        if not events:
+            logger.warning("[SQLiteLoader.load_events_with_sessions] - load_events_empty", message="No events to load")
+            return 0
+        
+        if case_id is None:
+            case_id = f"case_{uuid.uuid4().hex[:12]}"
+        
+        student_hash = self._hash_student_id(student_id)
+        
+        logger.info("[SQLiteLoader.load_events_with_sessions] - load_events_started",
+                   events=len(events),
+                   case_id=case_id,
+                   student_hash=student_hash[:8])
+        
+        writer = WriterThread(
+            self.db_path,
+            pragmas=("PRAGMA foreign_keys = ON", *_BULK_LOAD_PRAGMAS)
+        )
+        writer.start()
+        
+        try:
+            event_rows = []
+            session_rows = []
+            for session in detector.iter_sessions(events, case_id, student_id, keep_events=True):
+                event_rows += _build_rows(session.events, case_id, student_hash, session.id)
+                session.events = None
+                session_rows.append(session.to_db_row())
+                
+                if len(event_rows) >= self.batch_size:
+                    writer.submit(_INSERT_EVENT_SQL, event_rows)
+                    event_rows = []
+                if len(session_rows) >= self.batch_size:
+                    writer.submit(INSERT_SESSION_SQL, session_rows)
+                    session_rows = []
             
-            return self.events_loaded
+            if event_rows:
+                writer.submit(_INSERT_EVENT_SQL, event_rows)
+            if session_rows:
+                writer.submit(INSERT_SESSION_SQL, session_rows)
             
-        except sqlite3.Error as e:
-            conn.rollback()
+            writer.close()
+        except (sqlite3.Error, WriterError) as e:
             raise LoadError(f"Database error: {e}") from e
         finally:
-            conn.close()
+            if writer.is_alive():
+                writer.abort()
+        
+        skipped = len(events) - writer.changes_by_sql[_INSERT_EVENT_SQL]
+        if skipped:
+            logger.debug("[SQLiteLoader.load_events_with_sessions] - events_skipped",
+                        skipped=skipped,
+                        reason="duplicate id")
+            self.events_skipped += skipped
+        
+        self.events_loaded = len(events)
+        self.sessions_loaded = writer.changes_by_sql[INSERT_SESSION_SQL]
+        
+        logger.info("[SQLiteLoader.load_events_with_sessions] - load_events_completed",
+                   loaded=self.events_loaded,
+                   skipped=self.events_skipped,
+                   sessions=self.sessions_loaded)
+        
+        return self.events_loaded
     
     def _load_batch(
         self,
-        cursor: sqlite3.Cursor,
+        writer: WriterThread,
         batch: List[BaseEvent],
         case_id: str,
         student_hash: str,
         session_id: Optional[str]
     ) -> None:
-        """Carrega um batch de eventos."""
-        for event in batch:
-            row = self._event_to_row(event, case_id, student_hash, session_id)
-            
-            try:
-                cursor.execute("""
-                    INSERT INTO events (
-                        id, case_id, student_hash, task_id, activity,
-                        event_type, timestamp, duration_seconds,
-                        session_id, metadata
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, row)
-            except sqlite3.IntegrityError as e:
-                # Duplicata (id já existe) - skippa silenciosamente
-                logger.debug("[SQLiteLoader._load_batch] - event_skipped",
-                            event_id=row[0],
-                            reason=str(e))
-                self.events_skipped += 1
+        """
+        Prepara um batch de eventos e o envia à thread escritora.
+        
+        Duplicatas (id já existente) são ignoradas pelo INSERT OR IGNORE e
+        contabilizadas em events_skipped ao final de load_events.
+        """
+        writer.submit(_INSERT_EVENT_SQL, _build_rows(batch, case_id, student_hash, session_id))
     
     def _event_to_row(
         self,
@@ -156,26 +381,7 @@ class SQLiteLoader:
                    event_type, timestamp, duration_seconds, 
                    session_id, metadata_json)
         """
-        event_id = self._generate_event_id(event, case_id)
-        activity = self._map_activity(event)
-        event_type = type(event).__name__
-        timestamp = event.timestamp.isoformat()
-        duration_seconds = None
-        metadata = self._extract_metadata(event)
-        metadata_json = json.dumps(metadata, ensure_ascii=False)
-        
-        return (
-            event_id,
-            case_id,
-            student_hash,
-            event.task_id,
-            activity,
-            event_type,
-            timestamp,
-            duration_seconds,
-            session_id,
-            metadata_json
-        )
+        return _build_rows([event], case_id, student_hash, session_id)[0]
     
     def _generate_event_id(self, event: BaseEvent, case_id: str) -> str:
         """
@@ -183,9 +389,12 @@ class SQLiteLoader:
         
         Usa hash SHA256 de (case_id + timestamp + task_id + tipo).
         """
-        key = f"{case_id}|{event.timestamp.isoformat()}|{event.task_id}|{type(event).__name__}"
-        hash_digest = hashlib.sha256(key.encode()).hexdigest()
-        return f"evt_{hash_digest[:16]}"
+        return _event_id(
+            case_id,
+            event.timestamp.isoformat(),
+            event.task_id,
+            type(event).__name__
+        )
     
     def _hash_student_id(self, student_id: str) -> str:
         """
@@ -193,7 +402,7 @@ class SQLiteLoader:
         
         Preserva unicidade mas não permite reverter para ID original.
         """
-        return hashlib.sha256(student_id.encode()).hexdigest()
+        return sha256_hex(student_id)
     
     def _map_activity(self, event: BaseEvent) -> str:
         """
@@ -203,14 +412,7 @@ class SQLiteLoader:
         - MoveEvent → "task_navigation" 
         - SelfEvent → "self_assessment"
         """
-        if isinstance(event, ExecEvent):
-            return "test_execution"
-        elif isinstance(event, MoveEvent):
-            return "task_navigation"
-        elif isinstance(event, SelfEvent):
-            return "self_assessment"
-        else:
-            return "unknown_activity"
+        return _ACTIVITY_BY_TYPE.get(type(event), "unknown_activity")
     
     def _extract_metadata(self, event: BaseEvent) -> Dict[str, Any]:
         """
@@ -222,25 +424,9 @@ class SQLiteLoader:
             "version": event.version
         }
         
-        if isinstance(event, ExecEvent):
-            metadata.update({
-                "mode": event.mode,
-                "rate": event.rate,
-                "size": event.size,
-                "error": event.error
-            })
-        elif isinstance(event, MoveEvent):
-            metadata.update({
-                "action": event.action
-            })
-        elif isinstance(event, SelfEvent):
-            metadata.update({
-                "rate": event.rate,
-                "autonomy": event.autonomy,
-                "help_sources": event.get_help_sources(),
-                "has_help": event.has_any_help(),
-                "study_minutes": event.study_minutes
-            })
+        builder = _METADATA_BUILDER_BY_TYPE.get(type(event))
+        if builder is not None:
+            metadata.update(builder(event))
         
         return metadata
     
@@ -254,7 +440,7 @@ class SQLiteLoader:
         Returns:
             Número de eventos
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         if case_id:
@@ -263,7 +449,7 @@ class SQLiteLoader:
             cursor.execute("SELECT COUNT(*) FROM events")
         
         count = cursor.fetchone()[0]
-        conn.close()
+        conn.release()
         
         return count
     
@@ -284,8 +470,7 @@ class SQLiteLoader:
         Returns:
             Lista de eventos como dicionários
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         query = "SELECT * FROM events WHERE 1=1"
@@ -304,6 +489,6 @@ class SQLiteLoader:
         
         cursor.execute(query, params)
         rows = cursor.fetchall()
-        conn.close()
+        conn.release()
         
         return [dict(row) for row in rows]
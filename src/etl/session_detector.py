@@ -6,19 +6,42 @@ onde o gap temporal entre eventos consecutivos é menor que o timeout.
 """
 
 import hashlib
+import operator
 import structlog
-from typing import List, Tuple
+from itertools import islice, pairwise
+from typing import Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from ..models.events import BaseEvent, ExecEvent, MoveEvent, SelfEvent
+from .connection import get_connection
+from .hashing import sha256_short
+from .writer import WriterThread, WriterError
 
 logger = structlog.get_logger()
 
+# Linhas por executemany em save_sessions
+_SAVE_CHUNK_SIZE = 1000
 
-@dataclass
+# Também usado por SQLiteLoader.load_events_with_sessions
+INSERT_SESSION_SQL = """
+    INSERT OR IGNORE INTO sessions (
+        id, case_id, student_hash, task_id,
+        start_timestamp, end_timestamp, duration_seconds,
+        event_count, exec_count, move_count, self_count
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@dataclass(slots=True)
 class Session:
-    """Representa uma sessão de trabalho em uma tarefa."""
+    """
+    Representa uma sessão de trabalho em uma tarefa.
+    
+    Só contagens e timestamps são persistidos; a lista de eventos fica em
+    None por padrão (ver keep_events em detect_sessions) para não manter
+    referências a todos os eventos enquanto as sessões existirem.
+    """
     
     id: str
     case_id: str
@@ -31,7 +54,7 @@ class Session:
     exec_count: int
     move_count: int
     self_count: int
-    events: List[BaseEvent]
+    events: Optional[List[BaseEvent]] = None
     
     def to_db_row(self) -> Tuple:
         """Converte sessão para tupla para inserção no SQLite."""
@@ -85,7 +108,8 @@ class SessionDetector:
         self,
         events: List[BaseEvent],
         case_id: str,
-        student_id: str
+        student_id: str,
+        keep_events: bool = False
     ) -> List[Session]:
         """
         Detecta sessões a partir de lista de eventos.
@@ -94,16 +118,44 @@ class SessionDetector:
             events: Lista de eventos ordenados por timestamp
             case_id: ID do caso
             student_id: ID do estudante (será hasheado)
+            keep_events: Se True, preenche Session.events com os eventos da sessão
         
         Returns:
             Lista de sessões detectadas
         
+        Raises:
+            SessionError: Se eventos não estão ordenados ou há erros
+        """
+        return list(self.iter_sessions(events, case_id, student_id, keep_events))
+    
+    def iter_sessions(
+        self,
+        events: List[BaseEvent],
+        case_id: str,
+        student_id: str,
+        keep_events: bool = False
+    ) -> Iterator[Session]:
+        """
+        Detecta sessões sob demanda, uma por vez.
+        
+        Permite encadear detecção e persistência (save_sessions) sem
+        materializar a lista completa de sessões.
+        
+        Args:
+            events: Lista de eventos ordenados por timestamp
+            case_id: ID do caso
+            student_id: ID do estudante (será hasheado)
+            keep_events: Se True, preenche Session.events com os eventos da sessão
+        
+        Yields:
+            Sessões detectadas, em ordem cronológica
+        
         Raises:
             SessionError: Se eventos não estão ordenados ou há erros
         """
         if not events:
             logger.info("[SessionDetector.detect_sessions] -  no_events_to_process", case_id=case_id)
-            return []
+            return
         
         # Valida ordenação
         self._validate_event_order(events)
@@ -111,11 +163,6 @@ class SessionDetector:
         # Hash do student_id
         student_hash = self._hash_student_id(student_id)
         
-        # Detecta sessões
-        sessions = []
-        current_session_events = []
-        current_task_id = None
-        
         logger.info(
             "[SessionDetector.detect_sessions] - session_detection_started",
             case_id=case_id,
@@ -123,60 +170,55 @@ class SessionDetector:
             timeout_minutes=self.timeout_minutes
         )
         
-        for i, event in enumerate(events):
-            # Primeira iteração
-            if not current_session_events:
-                current_session_events.append(event)
-                current_task_id = event.task_id
-                continue
-            
-            last_event = current_session_events[-1]
-            time_gap = event.timestamp - last_event.timestamp
-            task_changed = event.task_id != current_task_id
-            
-            # Condições para nova sessão
-            if time_gap > self.timeout_delta or task_changed:
-                # Finaliza sessão atual
-                session = self._create_session(
-                    current_session_events,
-                    case_id,
-                    student_hash,
-                    current_task_id
-                )
-                sessions.append(session)
-                
-                # Inicia nova sessão
-                current_session_events = [event]
-                current_task_id = event.task_id
-            else:
-                # Continua sessão atual
-                current_session_events.append(event)
-        
-        # Finaliza última sessão
-        if current_session_events:
-            session = self._create_session(
-                current_session_events,
+        # Detecta sessões: limites onde o gap excede o timeout ou a tarefa muda
+        bounds = [0, *self._session_boundaries(events), len(events)]
+        for start, end in zip(bounds, bounds[1:]):
+            session_events = events[start:end]
+            yield self._create_session(
+                session_events,
                 case_id,
                 student_hash,
-                current_task_id
+                session_events[0].task_id,
+                keep_events
             )
-            sessions.append(session)
         
         logger.info(
             "[SessionDetector.detect_sessions] - session_detection_completed",
             case_id=case_id,
-            sessions=len(sessions),
+            sessions=len(bounds) - 1,
             total_events=len(events)
         )
+    
+    def _session_boundaries(self, events: List[BaseEvent]) -> List[int]:
+        """
+        Calcula os índices onde começa uma nova sessão (exceto o primeiro, 0).
+        
+        Uma única varredura compara cada evento com o anterior (gap e
+        tarefa); as sessões são depois fatiadas da lista original.
+        
+        Args:
+            events: Eventos ordenados por timestamp (não vazio)
         
-        return sessions
+        Returns:
+            Índices i em que events[i] inicia uma nova sessão
+        """
+        timeout = self.timeout_delta
+        boundaries = []
+        prev_ts, prev_task = events[0].timestamp, events[0].task_id
+        for i, event in enumerate(events):
+            ts, task = event.timestamp, event.task_id
+            if ts - prev_ts > timeout or task != prev_task:
+                boundaries.append(i)
+            prev_ts, prev_task = ts, task
+        return boundaries
     
     def _create_session(
         self,
         events: List[BaseEvent],
         case_id: str,
         student_hash: str,
-        task_id: str
+        task_id: str,
+        keep_events: bool = True
     ) -> Session:
         """
         Cria objeto Session a partir de lista de eventos.
@@ -186,6 +228,7 @@ class SessionDetector:
             case_id: ID do caso
             student_hash: Hash SHA256 do student_id
             task_id: ID da tarefa
+            keep_events: Se False, a sessão não guarda a lista de eventos
         
         Returns:
             Session criada
@@ -197,10 +240,17 @@ class SessionDetector:
         end_ts = events[-1].timestamp
         duration = int((end_ts - start_ts).total_seconds())
         
-        # Contadores por tipo
-        exec_count = sum(1 for e in events if isinstance(e, ExecEvent))
-        move_count = sum(1 for e in events if isinstance(e, MoveEvent))
-        self_count = sum(1 for e in events if isinstance(e, SelfEvent))
+        # Contadores por tipo, em uma única passada (os tipos de evento não
+        # têm subclasses, então basta comparar a identidade da classe)
+        exec_count = move_count = self_count = 0
+        for e in events:
+            t = type(e)
+            if t is ExecEvent:
+                exec_count += 1
+            elif t is MoveEvent:
+                move_count += 1
+            elif t is SelfEvent:
+                self_count += 1
         
         # ID determinístico
         session_id = self._generate_session_id(
@@ -222,7 +272,7 @@ class SessionDetector:
             exec_count=exec_count,
             move_count=move_count,
             self_count=self_count,
-            events=events
+            events=events if keep_events else None
         )
     
     def _generate_session_id(
@@ -245,8 +295,8 @@ class SessionDetector:
             Session ID (hash SHA256 truncado)
         """
         data = f"{case_id}|{task_id}|{start_ts.isoformat()}|{end_ts.isoformat()}"
-        hash_obj = hashlib.sha256(data.encode('utf-8'))
-        return hash_obj.hexdigest()[:16]
+        # 8 bytes -> 16 chars hex, sem gerar o hexdigest completo
+        return hashlib.sha256(data.encode('utf-8')).digest()[:8].hex()
     
     def _hash_student_id(self, student_id: str) -> str:
         """
@@ -258,8 +308,7 @@ class SessionDetector:
         Returns:
             Hash SHA256 truncado (8 caracteres)
         """
-        hash_obj = hashlib.sha256(student_id.encode('utf-8'))
-        return hash_obj.hexdigest()[:8]
+        return sha256_short(student_id)
     
     def _validate_event_order(self, events: List[BaseEvent]) -> None:
         """
@@ -271,20 +320,27 @@ class SessionDetector:
         Raises:
             SessionError: Se eventos não estão ordenados
         """
-        for i in range(len(events) - 1):
-            if events[i].timestamp > events[i + 1].timestamp:
+        timestamps = [e.timestamp for e in events]
+        if all(map(operator.le, timestamps, timestamps[1:])):
+            return
+        
+        # Caminho de erro: localiza o primeiro par fora de ordem para a mensagem
+        for i, (a, b) in enumerate(pairwise(timestamps)):
+            if a > b:
                 raise SessionError(
                     f"Events not sorted: event {i} timestamp "
-                    f"{events[i].timestamp} > event {i+1} timestamp "
-                    f"{events[i+1].timestamp}"
+                    f"{a} > event {i+1} timestamp {b}"
                 )
     
-    def save_sessions(self, sessions: List[Session], db_path: str) -> int:
+    def save_sessions(self, sessions: Iterable[Session], db_path: str) -> int:
         """
         Persiste sessões no banco SQLite.
         
+        As sessões são inseridas em blocos de _SAVE_CHUNK_SIZE linhas, de modo
+        que um gerador (ex.: iter_sessions) nunca é materializado por inteiro.
+        
         Args:
-            sessions: Lista de sessões detectadas
+            sessions: Sessões detectadas (lista ou iterável)
             db_path: Caminho do banco SQLite
         
         Returns:
@@ -295,43 +351,41 @@ class SessionDetector:
         """
         import sqlite3
         
-        if not sessions:
+        # Linhas montadas nesta thread, um bloco por vez: a thread escritora
+        # recebe listas prontas e só executa o INSERT
+        pending = (session.to_db_row() for session in sessions)
+        chunk = list(islice(pending, _SAVE_CHUNK_SIZE))
+        if not chunk:
             logger.info("[SessionDetector.save_sessions] - no_sessions_to_save")
             return 0
         
+        # A thread escritora insere um bloco enquanto o próximo é gerado
+        # (ex.: iter_sessions); tudo em uma transação, confirmada em close()
+        writer = WriterThread(db_path)
+        writer.start()
+        total = 0
+        
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Prepara dados
-            rows = [session.to_db_row() for session in sessions]
-            
-            # Insert batch
-            cursor.executemany(
-                """
-                INSERT OR IGNORE INTO sessions (
-                    id, case_id, student_hash, task_id,
-                    start_timestamp, end_timestamp, duration_seconds,
-                    event_count, exec_count, move_count, self_count
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                rows
-            )
-            
-            inserted = cursor.rowcount
-            conn.commit()
-            conn.close()
+            # Insert em blocos
+            while chunk:
+                writer.submit(INSERT_SESSION_SQL, chunk)
+                total += len(chunk)
+                chunk = list(islice(pending, _SAVE_CHUNK_SIZE))
             
-            logger.info(
-                "[SessionDetector.save_sessions] - sessions_saved",
-                sessions=len(sessions),
-                inserted=inserted
-            )
-            
-            return inserted
+            inserted = writer.close()
+        except (sqlite3.Error, WriterError) as e:
+            raise SessionError(f"Failed to save sessions: {e}") from e
+        finally:
+            if writer.is_alive():
+                writer.abort()
+        
+        logger.info(
+            "[SessionDetector.save_sessions] - sessions_saved",
+            sessions=total,
+            inserted=inserted
+        )
         
-        except sqlite3.Error as e:
-            raise SessionError(f"Failed to save sessions: {e}")
+        return inserted
 
 
 def get_sessions_from_db(
@@ -352,10 +406,7 @@ def get_sessions_from_db(
     Returns:
         Lista de sessões como dicionários
     """
-    import sqlite3
-    
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection(db_path)
     cursor = conn.cursor()
     
     query = "SELECT * FROM sessions WHERE 1=1"
@@ -377,6 +428,6 @@ def get_sessions_from_db(
     
     cursor.execute(query, params)
     rows = cursor.fetchall()
-    conn.close()
+    conn.release()
     
     return [dict(row) for row in rows]
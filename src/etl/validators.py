@@ -5,8 +5,9 @@ Este módulo implementa validações de integridade e consistência
 para eventos de telemetria TKO antes do carregamento no banco de dados.
 """
 
+import operator
 import structlog
-from datetime import datetime
+from itertools import compress, count
 from dataclasses import dataclass, field
 from typing import List, Set, Dict, Any, Optional
 
@@ -14,6 +15,32 @@ from src.models import BaseEvent, ExecEvent, SelfEvent
 
 logger = structlog.get_logger()
 
+# Modos de ExecEvent em que rate é obrigatório
+_RATE_REQUIRED_MODES = frozenset(('FULL', 'LOCK'))
+
+
+# Regras de range: fonte única, usada tanto na triagem de _scan_events
+# quanto na montagem dos erros (_validate_exec_event/_validate_self_event)
+
+def _exec_missing_rate(event: ExecEvent) -> bool:
+    """FULL/LOCK exigem rate."""
+    return event.rate is None and event.mode in _RATE_REQUIRED_MODES
+
+
+def _exec_invalid_size(event: ExecEvent) -> bool:
+    """size, quando presente, deve ser > 0."""
+    return event.size is not None and event.size <= 0
+
+
+def _self_low_rate(event: SelfEvent) -> bool:
+    """Autoavaliação com rate abaixo de 50%."""
+    return event.rate is not None and event.rate < 50
+
+
+def _self_low_autonomy(event: SelfEvent) -> bool:
+    """Autonomia abaixo de 3 (o aviso só é emitido se não houver ajuda)."""
+    return event.autonomy is not None and event.autonomy < 3
+
 
 @dataclass
 class ValidationError:
@@ -120,14 +147,7 @@ class EventValidator:
         logger.info("[EventValidator.validate] - validation_started", events=len(events))
         
         # Validações
-        if self.check_timestamps:
-            self._validate_timestamps(events, report)
-        
-        if self.check_duplicates:
-            self._validate_duplicates(events, report)
-        
-        if self.check_value_ranges:
-            self._validate_value_ranges(events, report)
+        self._validate_fused(events, report)
         
         # Contabiliza eventos válidos
         invalid_indices = {err.event_index for err in report.errors}
@@ -151,27 +171,56 @@ class EventValidator:
         Verifica se timestamps estão em ordem cronológica (monotônico crescente).
         Se allow_backwards_time=False, timestamps não-monotônicos são erros.
         """
-        prev_timestamp: Optional[datetime] = None
+        # Caminho rápido (caso comum): eventos já ordenados, verificados em
+        # uma única varredura em C sem montar erros nem o laço abaixo
+        timestamps = [event.timestamp for event in events]
+        if all(map(operator.le, timestamps, timestamps[1:])):
+            return
         
-        for idx, event in enumerate(events):
-            if prev_timestamp is not None:
-                if event.timestamp < prev_timestamp:
-                    error = ValidationError(
-                        event_index=idx,
-                        error_type="TIMESTAMP_ORDER",
-                        message=(
-                            f"Timestamp goes backwards: "
-                            f"{event.timestamp} < {prev_timestamp}"
-                        ),
-                        event_data={"timestamp": event.timestamp.isoformat()}
-                    )
-                    
-                    if self.allow_backwards_time:
-                        report.warnings.append(error)
-                    else:
-                        report.errors.append(error)
+        # Fora de ordem: os índices i com timestamps[i] < timestamps[i-1] são
+        # localizados por uma varredura em C; só eles passam pelo laço Python
+        backwards = compress(count(1), map(operator.gt, timestamps, timestamps[1:]))
+        
+        for idx in backwards:
+            timestamp = timestamps[idx]
+            prev_timestamp = timestamps[idx - 1]
+            error = ValidationError(
+                event_index=idx,
+                error_type="TIMESTAMP_ORDER",
+                message=(
+                    f"Timestamp goes backwards: "
+                    f"{timestamp} < {prev_timestamp}"
+                ),
+                event_data={"timestamp": timestamp.isoformat()}
+            )
             
-            prev_timestamp = event.timestamp
+            if self.allow_backwards_time:
+                report.warnings.append(error)
+            else:
+                report.errors.append(error)
+    
+    def _validate_fused(
+        self,
+        events: List[BaseEvent],
+        report: ValidationReport
+    ) -> None:
+        """
+        Executa as validações habilitadas com o mínimo de passadas.
+        
+        A ordem temporal é verificada pela varredura em C de
+        _validate_timestamps; duplicatas e ranges de valores compartilham um
+        único laço Python (_scan_events).
+        """
+        if self.check_timestamps:
+            self._validate_timestamps(events, report)
+        
+        if self.check_duplicates or self.check_value_ranges:
+            self._scan_events(
+                events,
+                report,
+                check_duplicates=self.check_duplicates,
+                check_value_ranges=self.check_value_ranges
+            )
     
     def _validate_duplicates(
         self, 
@@ -183,32 +232,7 @@ class EventValidator:
         
         Considera duplicado: mesmo timestamp + task_id + tipo de evento.
         """
-        seen: Set[tuple] = set()
-        
-        for idx, event in enumerate(events):
-            # Chave: (timestamp, task_id, tipo)
-            key = (
-                event.timestamp.isoformat(),
-                event.task_id,
-                type(event).__name__
-            )
-            
-            if key in seen:
-                report.errors.append(ValidationError(
-                    event_index=idx,
-                    error_type="DUPLICATE",
-                    message=(
-                        f"Duplicate event: {type(event).__name__} "
-                        f"for task '{event.task_id}' at {event.timestamp}"
-                    ),
-                    event_data={
-                        "timestamp": event.timestamp.isoformat(),
-                        "task_id": event.task_id,
-                        "event_type": type(event).__name__
-                    }
-                ))
-            else:
-                seen.add(key)
+        self._scan_events(events, report, check_duplicates=True, check_value_ranges=False)
     
     def _validate_value_ranges(
         self, 
@@ -221,11 +245,64 @@ class EventValidator:
         - ExecEvent: rate (0-100), size (>0)
         - SelfEvent: rate (0-100), autonomy (0-10), study_minutes (>=0)
         """
+        self._scan_events(events, report, check_duplicates=False, check_value_ranges=True)
+    
+    def _scan_events(
+        self,
+        events: List[BaseEvent],
+        report: ValidationReport,
+        check_duplicates: bool,
+        check_value_ranges: bool
+    ) -> None:
+        """
+        Laço único de detecção de duplicatas e validação de ranges.
+        
+        Os erros de cada verificação são acumulados separadamente e anexados
+        ao relatório na mesma ordem das passadas independentes (duplicatas
+        antes de ranges).
+        """
+        seen: Set[tuple] = set()
+        duplicate_errors: List[ValidationError] = []
+        ranges = ValidationReport()
+        
         for idx, event in enumerate(events):
-            if isinstance(event, ExecEvent):
-                self._validate_exec_event(idx, event, report)
-            elif isinstance(event, SelfEvent):
-                self._validate_self_event(idx, event, report)
+            event_cls = type(event)
+            
+            if check_duplicates:
+                # Chave: (timestamp, task_id, tipo) — datetime e classe são
+                # hasheáveis, dispensando isoformat()/__name__ por evento
+                key = (event.timestamp, event.task_id, event_cls)
+                
+                if key in seen:
+                    duplicate_errors.append(ValidationError(
+                        event_index=idx,
+                        error_type="DUPLICATE",
+                        message=(
+                            f"Duplicate event: {event_cls.__name__} "
+                            f"for task '{event.task_id}' at {event.timestamp}"
+                        ),
+                        event_data={
+                            "timestamp": event.timestamp.isoformat(),
+                            "task_id": event.task_id,
+                            "event_type": event_cls.__name__
+                        }
+                    ))
+                else:
+                    seen.add(key)
+            
+            # Triagem pelas regras compartilhadas; os erros só são montados
+            # para eventos que violam alguma delas
+            if check_value_ranges:
+                if isinstance(event, ExecEvent):
+                    if _exec_missing_rate(event) or _exec_invalid_size(event):
+                        self._validate_exec_event(idx, event, ranges)
+                elif isinstance(event, SelfEvent):
+                    if _self_low_rate(event) or _self_low_autonomy(event):
+                        self._validate_self_event(idx, event, ranges)
+        
+        report.errors.extend(duplicate_errors)
+        report.errors.extend(ranges.errors)
+        report.warnings.extend(ranges.warnings)
     
     def _validate_exec_event(
         self, 
@@ -234,7 +311,7 @@ class EventValidator:
         report: ValidationReport
     ) -> None:
         """Valida valores específicos de ExecEvent."""
-        if event.mode in ['FULL', 'LOCK'] and event.rate is None:
+        if _exec_missing_rate(event):
             report.errors.append(ValidationError(
                 event_index=idx,
                 error_type="VALUE_MISSING",
@@ -242,7 +319,7 @@ class EventValidator:
                 event_data={"mode": event.mode, "rate": None}
             ))
         
-        if event.size is not None and event.size <= 0:
+        if _exec_invalid_size(event):
             report.errors.append(ValidationError(
                 event_index=idx,
                 error_type="VALUE_RANGE",
@@ -257,7 +334,7 @@ class EventValidator:
         report: ValidationReport
     ) -> None:
         """Valida valores específicos de SelfEvent."""
-        if event.rate is not None and event.rate < 50:
+        if _self_low_rate(event):
             report.warnings.append(ValidationError(
                 event_index=idx,
                 error_type="VALUE_WARNING",
@@ -265,7 +342,7 @@ class EventValidator:
                 event_data={"rate": event.rate}
             ))
 
-        if event.autonomy is not None and event.autonomy < 3:
+        if _self_low_autonomy(event):
             if not event.has_any_help():
                 report.warnings.append(ValidationError(
                     event_index=idx,
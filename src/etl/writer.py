@@ -0,0 +1,166 @@
+"""
+Thread escritora para cargas em massa no SQLite.
+
+A thread é dona da conexão e consome uma fila de (sql, rows): enquanto ela
+executa o executemany de um batch, a thread chamadora já prepara o próximo
+(o sqlite3 libera o GIL durante a execução dos statements). Todos os batches
+entram em uma única transação, confirmada em close().
+"""
+
+import queue
+import sqlite3
+import threading
+import structlog
+from pathlib import Path
+from collections import Counter
+from typing import Iterable, Optional, Sequence, Union
+
+from .connection import _CONNECTION_PRAGMAS, checkpoint_wal, WAL_CHECKPOINT_MIN_ROWS
+
+logger = structlog.get_logger()
+
+# Marcadores de fim da fila
+_COMMIT = object()
+_ROLLBACK = object()
+
+
+class WriterError(Exception):
+    """Falha na thread escritora que não veio do SQLite (ex.: gerador de linhas)."""
+    pass
+
+
+class WriterThread(threading.Thread):
+    """
+    Executa os INSERTs de uma carga em segundo plano.
+
+    submit() enfileira um batch e retorna imediatamente; a fila é limitada
+    (max_pending) para que a preparação não acumule batches na memória.
+    changes_by_sql separa as linhas alteradas por statement quando a mesma
+    transação grava em mais de uma tabela. Qualquer erro na thread (inclusive
+    no COMMIT) é guardado e relançado no próximo submit() ou em close() -
+    sqlite3.Error como está, os demais encapsulados em WriterError; os
+    batches restantes são descartados e a transação desfeita.
+
+    Uso:
+        writer = WriterThread(db_path)
+        writer.start()
+        writer.submit(sql, rows)
+        changes = writer.close()
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        pragmas: Sequence[str] = _CONNECTION_PRAGMAS,
+        max_pending: int = 2
+    ):
+        """
+        Args:
+            db_path: Caminho do banco SQLite (ou URI "file:...")
+            pragmas: PRAGMAs aplicados na conexão antes da transação
+            max_pending: Número máximo de batches aguardando na fila
+        """
+        super().__init__(name="sqlite-writer", daemon=True)
+        self.db_path = str(db_path)
+        self.pragmas = tuple(pragmas)
+        self.changes = 0
+        self.changes_by_sql: Counter = Counter()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+
+    def submit(self, sql: str, rows: Iterable[tuple]) -> None:
+        """
+        Enfileira um executemany para a thread escritora.
+
+        rows pode ser um gerador: ele é consumido pelo executemany na thread
+        escritora, uma tupla por vez, sem lista intermediária.
+
+        Raises:
+            sqlite3.Error, WriterError: O erro de um batch anterior que já falhou
+        """
+        self._raise_pending_error()
+        self._queue.put((sql, rows))
+
+    def close(self) -> int:
+        """
+        Aguarda os batches pendentes e confirma a transação.
+
+        Acima de WAL_CHECKPOINT_MIN_ROWS linhas gravadas, trunca também o
+        arquivo -wal.
+
+        Returns:
+            Número de linhas efetivamente alteradas (total_changes)
+
+        Raises:
+            sqlite3.Error, WriterError: O erro de algum batch, do COMMIT ou do
+                checkpoint
+        """
+        self._queue.put(_COMMIT)
+        self.join()
+        self._raise_pending_error()
+        return self.changes
+
+    def abort(self) -> None:
+        """Descarta os batches pendentes e desfaz a transação."""
+        self._queue.put(_ROLLBACK)
+        self.join()
+
+    def _raise_pending_error(self) -> None:
+        error = self._error
+        if error is None:
+            return
+        if isinstance(error, sqlite3.Error):
+            raise error
+        raise WriterError(f"{type(error).__name__}: {error}") from error
+
+    def run(self) -> None:
+        conn = None
+        # True quando o marcador de fim (_COMMIT/_ROLLBACK) já foi consumido
+        done = False
+        try:
+            conn = sqlite3.connect(
+                self.db_path,
+                uri=self.db_path.startswith("file:"),
+                isolation_level=None,
+                cached_statements=256
+            )
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            conn.execute("BEGIN IMMEDIATE")
+
+            changes_before = conn.total_changes
+            while True:
+                item = self._queue.get()
+                done = item is _COMMIT or item is _ROLLBACK
+                if item is _COMMIT:
+                    conn.execute("COMMIT")
+                    break
+                if item is _ROLLBACK:
+                    conn.execute("ROLLBACK")
+                    break
+                sql, rows = item
+                before = conn.total_changes
+                conn.executemany(sql, rows)
+                self.changes_by_sql[sql] += conn.total_changes - before
+            self.changes = conn.total_changes - changes_before
+
+            if item is _COMMIT and self.changes > WAL_CHECKPOINT_MIN_ROWS:
+                checkpoint_wal(conn)
+
+        except Exception as e:
+            self._error = e
+            logger.error("[WriterThread.run] - writer_failed", error=str(e))
+            if conn is not None and conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            # Esvazia a fila até o marcador de fim para não bloquear submit();
+            # se a falha veio do COMMIT/checkpoint, o marcador já foi consumido
+            while not done:
+                item = self._queue.get()
+                done = item is _COMMIT or item is _ROLLBACK
+
+        finally:
+            if conn is not None:
+                conn.close()
@@ -11,9 +11,8 @@ import sqlite3
 import structlog
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
 from xml.etree import ElementTree as ET
-from xml.dom import minidom
 
 logger = structlog.get_logger()
 
@@ -86,20 +85,24 @@ class XESExporter:
             task_id=task_id
         )
         
+        # Linhas lidas do cursor sob demanda e agrupadas em uma única passada
         events = self._load_events_from_db(db_path, case_id, task_id)
-        if not events:
-            raise XESExportError("No events found to export")
         traces = self._group_events_into_traces(events)
-        xes_root = self._create_xes_structure(traces)
-        
-        self._save_xes_file(xes_root, output_path)
+        if not traces:
+            raise XESExportError("No events found to export")
         
+        # Estatísticas a partir dos traces (todo trace tem ao menos um evento
+        # e um único case_id), sem nova passada pelos eventos
         stats = {
             'traces': len(traces),
-            'events': len(events),
-            'cases': len(set(e['case_id'] for e in events))
+            'events': sum(map(len, traces.values())),
+            'cases': len({trace[0]['case_id'] for trace in traces.values()})
         }
         
+        xes_root = self._create_xes_structure(traces)
+        
+        self._save_xes_file(xes_root, output_path)
+        
         logger.info(
             "[XESExporter.export_from_db] - xes_export_completed",
             output_path=output_path,
@@ -113,22 +116,25 @@ class XESExporter:
         db_path: str,
         case_id: Optional[str],
         task_id: Optional[str]
-    ) -> List[Dict]:
+    ) -> Iterator[sqlite3.Row]:
         """
-        Carrega eventos do banco SQLite.
+        Carrega eventos do banco SQLite sob demanda.
+        
+        As linhas são entregues conforme o cursor avança (sem fetchall nem
+        conversão para dict); sqlite3.Row já permite acesso por nome de
+        coluna. A conexão fica aberta até o fim da iteração.
         
         Args:
             db_path: Caminho do banco
             case_id: Filtro opcional por case_id
             task_id: Filtro opcional por task_id
         
-        Returns:
-            Lista de eventos como dicionários
+        Yields:
+            Eventos (sqlite3.Row) em ordem de timestamp
         """
         try:
             conn = sqlite3.connect(db_path)
             conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
             
             query = """
                 SELECT 
@@ -157,16 +163,15 @@ class XESExporter:
             
             query += " ORDER BY timestamp ASC"
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
-            
-            return [dict(row) for row in rows]
+            try:
+                yield from conn.execute(query, params)
+            finally:
+                conn.close()
         
         except sqlite3.Error as e:
             raise XESExportError(f"Failed to load events from database: {e}")
     
-    def _group_events_into_traces(self, events: List[Dict]) -> Dict[str, List[Dict]]:
+    def _group_events_into_traces(self, events: Iterable[Mapping]) -> Dict[str, List[Mapping]]:
         """
         Agrupa eventos em traces (case_id + task_id).
         
@@ -174,7 +179,7 @@ class XESExporter:
         trabalhando em uma tarefa específica.
         
         Args:
-            events: Lista de eventos
+            events: Eventos (lista ou iterável, ex.: _load_events_from_db)
         
         Returns:
             Dicionário {trace_id: [eventos]}
@@ -185,14 +190,15 @@ class XESExporter:
             # Trace ID = case_id + task_id
             trace_id = f"{event['case_id']}_{event['task_id']}"
             
-            if trace_id not in traces:
-                traces[trace_id] = []
+            trace = traces.get(trace_id)
+            if trace is None:
+                trace = traces[trace_id] = []
             
-            traces[trace_id].append(event)
+            trace.append(event)
         
         return traces
     
-    def _create_xes_structure(self, traces: Dict[str, List[Dict]]) -> ET.Element:
+    def _create_xes_structure(self, traces: Dict[str, List[Mapping]]) -> ET.Element:
         """
         Cria estrutura XML XES.
         
@@ -272,7 +278,7 @@ class XESExporter:
         string_attr.set('key', 'lifecycle:transition')
         string_attr.set('value', 'complete')
     
-    def _create_trace(self, trace_id: str, events: List[Dict]) -> ET.Element:
+    def _create_trace(self, trace_id: str, events: List[Mapping]) -> ET.Element:
         """
         Cria elemento trace com seus eventos.
         
@@ -311,7 +317,7 @@ class XESExporter:
         
         return trace
     
-    def _create_event(self, event_data: Dict) -> ET.Element:
+    def _create_event(self, event_data: Mapping) -> ET.Element:
         """
         Cria elemento event com atributos.
         
@@ -381,17 +387,17 @@ class XESExporter:
             output_path: Caminho do arquivo de saída
         """
         try:
-            # Converte para string XML
-            xml_str = ET.tostring(root, encoding='unicode')
-            
-            # Pretty print
-            dom = minidom.parseString(xml_str)
-            pretty_xml = dom.toprettyxml(indent='  ', encoding='UTF-8')
+            # Indenta a própria árvore e grava direto no arquivo, sem gerar a
+            # string XML completa nem um DOM minidom intermediário
+            ET.indent(root, space='  ')
             
-            # Salva arquivo
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
-            output_file.write_bytes(pretty_xml)
+            ET.ElementTree(root).write(
+                str(output_file),
+                encoding='UTF-8',
+                xml_declaration=True
+            )
             
         except Exception as e:
             raise XESExportError(f"Failed to save XES file: {e}")
@@ -14,6 +14,7 @@ from typing import List, Optional, Dict, Any
 
 from ..models.events import BaseEvent, ExecEvent, MoveEvent, SelfEvent
 from ..etl.session_detector import Session
+from ..etl.hashing import sha256_short
 
 logger = structlog.get_logger()
 
@@ -529,9 +530,8 @@ class MetricsEngine:
         return hash_obj.hexdigest()[:16]
     
     def _hash_student_id(self, student_id: str) -> str:
-        """Anonimiza student_id via SHA256."""
-        hash_obj = hashlib.sha256(student_id.encode('utf-8'))
-        return hash_obj.hexdigest()[:8]
+        """Anonimiza student_id via SHA256 (prefixo de 8 caracteres, em cache)."""
+        return sha256_short(student_id)
     
     def save_metrics(self, metrics: List[MetricResult], db_path: str) -> int:
         """
@@ -552,7 +552,7 @@ class MetricsEngine:
             return 0
         
         try:
-            conn = sqlite3.connect(db_path)
+            conn = sqlite3.connect(db_path, uri=str(db_path).startswith("file:"))
             cursor = conn.cursor()
             rows = [metric.to_db_row() for metric in metrics]
             cursor.executemany(
@@ -599,7 +599,7 @@ def get_metrics_from_db(
     Returns:
         Lista de métricas como dicionários
     """
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, uri=str(db_path).startswith("file:"))
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
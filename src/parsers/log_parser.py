@@ -5,16 +5,19 @@ Este módulo implementa o parser de arquivos CSV de telemetria TKO,
 convertendo linhas CSV em modelos Pydantic validados.
 """
 
+import io
 import csv
 import structlog
 from pathlib import Path
 from datetime import datetime
-from typing import List, Union, Optional
+from typing import Any, List, Union, Optional, TextIO, Type, TypeVar
 
 from src.models import BaseEvent, ExecEvent, MoveEvent, SelfEvent
 
 logger = structlog.get_logger()
 
+_EventT = TypeVar('_EventT', bound=BaseEvent)
+
 class ParseError(Exception):
     """Erro ao parsear linha CSV."""
     
@@ -33,16 +36,28 @@ class LogParser:
     com suporte a múltiplos tipos de eventos (exec, move, self).
     """
     
-    def __init__(self, strict: bool = True):
+    def __init__(self, strict: bool = True, validate: bool = True):
         """
         Inicializa o parser.
         
         Args:
             strict: Se True, lança exceção em linhas inválidas.
                    Se False, registra erro e continua.
+            validate: Se True, eventos passam pela validação Pydantic.
+                   Se False, usa model_construct (sem validação) - apenas
+                   para dados confiáveis, já validados anteriormente.
         """
         self.strict = strict
+        self.validate = validate
         self.errors: List[ParseError] = []
+    
+    def reset(self) -> None:
+        """
+        Limpa o estado acumulado entre parses (erros coletados).
+        
+        Permite reutilizar a mesma instância do parser para vários arquivos.
+        """
+        self.errors.clear()
         
     def parse_file(self, filepath: Union[str, Path]) -> List[BaseEvent]:
         """
@@ -62,26 +77,52 @@ class LogParser:
         if not filepath.exists():
             raise FileNotFoundError(f"File not found: {filepath}")
         
-        self.errors.clear()
-        events = []
-        
         logger.info("[LogParser.parse_file] - parsing_csv", file=str(filepath))
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            return self._parse_stream(f)
+    
+    def parse_text(self, text: str) -> List[BaseEvent]:
+        """
+        Parseia conteúdo CSV já carregado em memória.
+        
+        Args:
+            text: Conteúdo CSV completo (cabeçalho + linhas)
+            
+        Returns:
+            Lista de eventos parseados e validados
+            
+        Raises:
+            ParseError: Se strict=True e houver erro de parse
+        """
+        return self._parse_stream(io.StringIO(text, newline=''))
+    
+    def _parse_stream(self, stream: TextIO) -> List[BaseEvent]:
+        """
+        Parseia linhas CSV de um stream de texto (laço comum a arquivo e texto).
+        
+        Args:
+            stream: Stream de texto posicionado no cabeçalho CSV
             
-            for _, row in enumerate(reader, start=2):  # start=2 (pula cabeçalho - linha 1)
-                try:
-                    event = self._parse_line(row)
-                    if event:
-                        events.append(event)
-                except ParseError as e:
-                    if self.strict:
-                        raise
-                    logger.warning("[LogParser.parse_file] parse_error", **e.__dict__)
-                    self.errors.append(e)
+        Returns:
+            Lista de eventos parseados e validados
+        """
+        self.reset()
+        events = []
+        reader = csv.DictReader(stream)
+        
+        for _, row in enumerate(reader, start=2):  # start=2 (pula cabeçalho - linha 1)
+            try:
+                event = self._parse_line(row)
+                if event:
+                    events.append(event)
+            except ParseError as e:
+                if self.strict:
+                    raise
+                logger.warning("[LogParser._parse_stream] parse_error", **e.__dict__)
+                self.errors.append(e)
                     
-        logger.info("[LogParser.parse_file] - parsing_complete", 
+        logger.info("[LogParser._parse_stream] - parsing_complete", 
                    events=len(events), 
                    errors=len(self.errors))
         
@@ -162,7 +203,8 @@ class LogParser:
             if not error:
                 error = 'NONE'
             
-            return ExecEvent(
+            return self._build_event(
+                ExecEvent,
                 timestamp=timestamp,
                 task_id=task_id,
                 mode=mode,
@@ -186,6 +228,12 @@ class LogParser:
     ) -> MoveEvent:
         """Parseia evento de navegação."""
         try:
+            if not self.validate:
+                return MoveEvent.model_construct(
+                    action=mode,
+                    timestamp=timestamp,
+                    task_id=task_id
+                )
             return MoveEvent.from_mode(
                 mode=mode,
                 timestamp=timestamp,
@@ -221,7 +269,8 @@ class LogParser:
             study_str = row.get('study', '').strip()
             study_minutes = int(study_str) if study_str else 0
             
-            return SelfEvent(
+            return self._build_event(
+                SelfEvent,
                 timestamp=timestamp,
                 task_id=task_id,
                 rate=rate,
@@ -239,6 +288,18 @@ class LogParser:
                 reason=f"Invalid SelfEvent fields: {e}"
             )
     
+    def _build_event(self, event_cls: Type[_EventT], **fields: Any) -> _EventT:
+        """
+        Constrói o evento com ou sem validação Pydantic, conforme self.validate.
+        
+        Args:
+            event_cls: Classe do evento (ExecEvent, MoveEvent, SelfEvent)
+            **fields: Campos do evento (por nome, não por alias)
+        """
+        if self.validate:
+            return event_cls(**fields)
+        return event_cls.model_construct(**fields)
+    
     def _parse_bool(self, value: str) -> bool:
         """
         Converte string CSV para booleano.
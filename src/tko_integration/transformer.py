@@ -8,15 +8,56 @@ Responsável por:
 - Normalização de valores de campos
 """
 
+import re
 import csv
 import hashlib
+import operator
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 
 from .parser import TrackingParser
 from .scanner import ClassroomScan, StudentRepo
 from .parser import LogParser, TKOLogEvent, ValueNormalizer
 
+# Prefixos de repositório removidos das chaves de tarefa (ex.: poo@toalha -> toalha)
+_TASK_PREFIX_RE = re.compile(r'^(?:poo|fup|ed|repo)@')
+
+# Colunas do CSV de saída (ordem do cabeçalho)
+_CSV_FIELDNAMES = (
+    'timestamp', 'student_id', 'task', 'event_type', 'mode',
+    'rate', 'size', 'human', 'iagen', 'guide', 'other', 'alone', 'study'
+)
+# Buffer de escrita de 1 MiB: reduz o número de syscalls write() em saídas grandes
+_CSV_BUFFER_SIZE = 1 << 20
+# Extrai os valores de uma linha (dict) na ordem do cabeçalho
+_row_values = operator.itemgetter(*_CSV_FIELDNAMES)
+
+
+def _write_csv_rows(output_path: Path, rows: Iterable[Dict[str, Any]], append: bool = False) -> None:
+    """
+    Escreve linhas no CSV com csv.writer sobre um arquivo com buffer grande.
+    
+    Mesmo formato do csv.DictWriter (QUOTE_MINIMAL, terminador '\r\n'), de
+    modo que um append em arquivo já existente mantém os finais de linha;
+    as linhas viram tuplas via itemgetter, sem a conversão por linha do DictWriter.
+    
+    Args:
+        output_path: Caminho do arquivo CSV
+        rows: Linhas a escrever
+        append: Se True, adiciona ao arquivo sem reescrever o cabeçalho
+    """
+    with open(
+        output_path,
+        'a' if append else 'w',
+        newline='',
+        encoding='utf-8',
+        buffering=_CSV_BUFFER_SIZE
+    ) as f:
+        writer = csv.writer(f)
+        if not append:
+            writer.writerow(_CSV_FIELDNAMES)
+        writer.writerows(map(_row_values, rows))
+
 
 class TKOTransformer:
     """
@@ -31,6 +72,8 @@ class TKOTransformer:
             student_id_salt: Salt secreto para hash de IDs de estudantes
         """
         self.student_id_salt = student_id_salt
+        # Salt codificado uma única vez (reutilizado a cada pseudonimização)
+        self._salt_bytes = student_id_salt.encode('utf-8')
     
     def pseudonymize_student_id(self, username: str) -> str:
         """
@@ -42,8 +85,7 @@ class TKOTransformer:
         Returns:
             Hash de 8 caracteres (ex.: "a1b2c3d4")
         """
-        data = f"{username}{self.student_id_salt}"
-        hash_obj = hashlib.sha256(data.encode('utf-8'))
+        hash_obj = hashlib.sha256(username.encode('utf-8') + self._salt_bytes)
         return hash_obj.hexdigest()[:8]
     
     def normalize_task_key(self, task_key: str) -> str:
@@ -54,12 +96,7 @@ class TKOTransformer:
             poo@toalha -> toalha
             toalha -> toalha
         """
-        # Remove prefixos comuns
-        prefixes = ['poo@', 'fup@', 'ed@', 'repo@']
-        for prefix in prefixes:
-            if task_key.startswith(prefix):
-                return task_key[len(prefix):]
-        return task_key
+        return _TASK_PREFIX_RE.sub('', task_key, count=1)
     
     def event_to_csv_row(self, event: TKOLogEvent, student_hash: str) -> Dict[str, Any]:
         """
@@ -144,25 +181,13 @@ class TKOTransformer:
         
         # Ordenar por timestamp
         all_rows.sort(key=lambda r: r['timestamp'])
-        # Escrever CSV
-        fieldnames = [
-            'timestamp', 'student_id', 'task', 'event_type', 'mode', 
-            'rate', 'size', 'human', 'iagen', 'guide', 'other', 'alone', 'study'
-        ]
         
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Modo append: adiciona sem cabeçalho se arquivo existe
-        if mode == 'append' and output_path.exists():
-            with open(output_path, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writerows(all_rows)
-        else:
-            # Modo new: cria novo arquivo com cabeçalho
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(all_rows)
+        # Modo new: cria novo arquivo com cabeçalho
+        append = mode == 'append' and output_path.exists()
+        _write_csv_rows(output_path, all_rows, append=append)
         
         return total_events
     
@@ -235,15 +260,7 @@ class TKOTransformer:
         
         # Ordenar e escrever
         all_rows.sort(key=lambda r: r['timestamp'])
-        fieldnames = [
-            'timestamp', 'student_id', 'task', 'event_type', 'mode', 
-            'rate', 'size', 'human', 'iagen', 'guide', 'other', 'alone', 'study'
-        ]
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_rows)
+        _write_csv_rows(output_path, all_rows)
         
         return len(all_rows)
@@ -0,0 +1,27 @@
+"""
+Configuração compartilhada do pytest para toda a suíte.
+"""
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    """Pula benchmarks a menos que selecionados explicitamente com -m benchmark."""
+    if "benchmark" in (config.option.markexpr or ""):
+        return
+    skip_benchmark = pytest.mark.skip(reason="benchmark: selecione com -m benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+@pytest.fixture(scope="session")
+def xdist_worker(request):
+    """
+    Identificador do worker do pytest-xdist ("master" fora do xdist).
+    
+    Usado para isolar bancos de teste compartilhados na sessão entre workers.
+    Nome próprio para não sobrescrever o fixture worker_id do pytest-xdist;
+    lê workerinput diretamente, então também funciona sem o plugin instalado.
+    """
+    return getattr(request.config, "workerinput", {}).get("workerid", "master")
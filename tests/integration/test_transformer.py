@@ -10,7 +10,7 @@ from datetime import datetime
 from src.tko_integration.parser import TKOLogEvent
 from src.tko_integration.scanner import StudentRepo
 from src.tko_integration.scanner import ClassroomScanner
-from src.tko_integration.transformer import TKOTransformer
+from src.tko_integration.transformer import TKOTransformer, _CSV_FIELDNAMES, _write_csv_rows
 
 
 def test_pseudonymize_student_id():
@@ -214,3 +214,50 @@ def test_transform_with_multi_block(minimal_classroom_multi_block, tmp_path):
     assert 'tarefa1' in tasks
     assert 'tarefa2' in tasks
 
+
+
+def _tricky_rows():
+    """Linhas com campos que exigem quoting (vírgula, aspas, quebras de linha, não-ASCII)."""
+    base = dict.fromkeys(_CSV_FIELDNAMES, '')
+    return [
+        {**base, 'timestamp': '2024-01-01T10:00:00', 'task': 'a,b', 'other': 'disse "oi"', 'rate': 100},
+        {**base, 'timestamp': '2024-01-01T10:01:00', 'task': 'linha\nquebrada', 'other': 'cr\rlf\r\n', 'size': 0},
+        {**base, 'timestamp': '2024-01-01T10:02:00', 'task': 'ação çé ñ 漢字', 'other': ' espaço ', 'study': 4096},
+    ]
+
+
+def test_write_csv_rows_matches_dictwriter(tmp_path):
+    """Testa que a saída é idêntica byte a byte à do csv.DictWriter e faz round-trip."""
+    rows = _tricky_rows()
+    csv_path = tmp_path / "events.csv"
+    expected_path = tmp_path / "expected.csv"
+    
+    _write_csv_rows(csv_path, rows)
+    with open(expected_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=_CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+    
+    assert csv_path.read_bytes() == expected_path.read_bytes()
+    
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        read_back = list(csv.DictReader(f))
+    assert read_back == [{k: str(v) for k, v in row.items()} for row in rows]
+
+
+def test_write_csv_rows_append_keeps_line_endings(tmp_path):
+    """Testa que o append em um CSV do csv.DictWriter mantém os terminadores '\\r\\n'."""
+    # Linhas sem quebras dentro dos campos: todo '\n' do arquivo é terminador
+    first, _, last = _tricky_rows()
+    csv_path = tmp_path / "events.csv"
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=_CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerow(first)
+    
+    _write_csv_rows(csv_path, [last], append=True)
+    
+    content = csv_path.read_bytes()
+    assert content.count(b'\n') == content.count(b'\r\n') == 3
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        assert [row['task'] for row in csv.DictReader(f)] == ['a,b', 'ação çé ñ 漢字']
@@ -0,0 +1,97 @@
+"""
+Fixtures compartilhadas dos testes unitários.
+"""
+
+import sqlite3
+import uuid
+
+import pytest
+
+import src.metrics.engine as metrics_engine
+from src.etl.connection import close_connections
+from src.etl.init_db import init_database
+from src.etl.session_detector import SessionDetector
+
+
+@pytest.fixture(autouse=True)
+def _close_cached_connections():
+    """Fecha as conexões em cache (src.etl.connection) ao fim de cada teste."""
+    yield
+    close_connections()
+
+
+@pytest.fixture(scope="session")
+def empty_db_template(tmp_path_factory, xdist_worker):
+    """
+    Banco vazio com o schema aplicado uma única vez por sessão.
+    
+    Fixtures que precisam de um banco limpo copiam este arquivo com
+    shutil.copyfile em vez de reexecutar o DDL de init_database.
+    """
+    db_path = tmp_path_factory.mktemp(f"template_{xdist_worker}") / "empty.db"
+    init_database(str(db_path), fast=True)
+    return db_path
+
+
+@pytest.fixture
+def mem_db_uri(xdist_worker):
+    """
+    Cria banco em memória compartilhado (URI SQLite) para testes.
+    
+    Uma conexão é mantida aberta durante o teste para que o banco não seja
+    descartado quando o código testado fecha as suas.
+    """
+    uri = f"file:mem_{xdist_worker}_{uuid.uuid4().hex}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(uri, uri=True)
+    init_database(uri, fast=True)
+    yield uri
+    keeper.close()
+
+
+@pytest.fixture(scope="session")
+def detector():
+    """
+    Detector com timeout padrão de 30 minutos, compartilhado na sessão.
+    
+    SessionDetector não guarda estado entre chamadas: detect_sessions e
+    save_sessions recebem todas as entradas por argumento.
+    """
+    return SessionDetector(timeout_minutes=30)
+
+
+class _SharedConnection(sqlite3.Connection):
+    """Conexão reaproveitada entre chamadas: close() só ocorre no teardown."""
+    
+    def close(self):
+        pass
+    
+    def really_close(self):
+        super().close()
+
+
+@pytest.fixture
+def reuse_sqlite_connections(monkeypatch):
+    """
+    Reutiliza uma única conexão SQLite por banco em save_metrics/get_metrics_from_db.
+    
+    Evita abrir/fechar uma conexão (e reler o schema) a cada chamada quando
+    um teste grava e lê o mesmo banco várias vezes. Só sqlite3.connect é
+    substituído; chamadas com outras opções além de uri (factory de
+    get_connection, isolation_level da WriterThread) seguem para o connect
+    original.
+    """
+    cache = {}
+    real_connect = sqlite3.connect
+    
+    def _connect(database, *args, **kwargs):
+        if args or set(kwargs) - {"uri"}:
+            return real_connect(database, *args, **kwargs)
+        key = str(database)
+        if key not in cache:
+            cache[key] = real_connect(database, factory=_SharedConnection, **kwargs)
+        return cache[key]
+    
+    monkeypatch.setattr(metrics_engine.sqlite3, "connect", _connect)
+    yield cache
+    for conn in cache.values():
+        conn.really_close()
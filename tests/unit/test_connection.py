@@ -0,0 +1,150 @@
+"""
+Testes para o cache de conexões SQLite por thread.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+from flask import Flask
+
+from src.dashboard.app import init_db_connections
+from src.etl.connection import (
+    get_connection,
+    close_connections,
+    invalidate_connections,
+    checkpoint_wal,
+)
+from src.etl.init_db import init_database
+
+
+class TestGetConnection:
+    """Testes de get_connection."""
+
+    def test_same_connection_per_thread(self, mem_db_uri):
+        """Testa que a mesma thread recebe a mesma conexão."""
+        assert get_connection(mem_db_uri) is get_connection(mem_db_uri)
+
+    def test_rows_are_sqlite_rows(self, mem_db_uri):
+        """Testa que row_factory já vem configurado."""
+        row = get_connection(mem_db_uri).execute("SELECT COUNT(*) AS n FROM events").fetchone()
+        assert isinstance(row, sqlite3.Row)
+        assert row["n"] == row[0] == 0
+
+    def test_release_keeps_connection_open(self, mem_db_uri):
+        """Testa que release() mantém a conexão utilizável e em cache."""
+        conn = get_connection(mem_db_uri)
+        conn.release()
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+        assert get_connection(mem_db_uri) is conn
+
+    def test_release_discards_uncommitted_work(self, mem_db_uri):
+        """Testa que release() sem commit desfaz a transação pendente."""
+        conn = get_connection(mem_db_uri)
+        conn.execute("DELETE FROM sessions")
+        conn.execute(
+            "INSERT INTO sessions (id, case_id, student_hash, task_id, "
+            "start_timestamp, end_timestamp, duration_seconds) "
+            "VALUES ('s1', 'c', 'h', 't', 'a', 'b', 0)"
+        )
+        conn.release()
+
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+
+    def test_close_really_closes_and_evicts(self, mem_db_uri):
+        """Testa que close() fecha a conexão e a remove do cache."""
+        conn = get_connection(mem_db_uri)
+        conn.close()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        assert get_connection(mem_db_uri).execute("SELECT 1").fetchone()[0] == 1
+
+    def test_other_thread_gets_own_connection(self, mem_db_uri):
+        """Testa que cada thread tem sua própria conexão."""
+        main_conn = get_connection(mem_db_uri)
+        other = []
+
+        def worker():
+            other.append(get_connection(mem_db_uri))
+            close_connections()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert other[0] is not main_conn
+
+    def test_close_connections_resets_cache(self, mem_db_uri):
+        """Testa que close_connections descarta as conexões da thread."""
+        conn = get_connection(mem_db_uri)
+        close_connections()
+        assert get_connection(mem_db_uri) is not conn
+
+    def test_invalidate_reopens_in_every_thread(self, mem_db_uri):
+        """Testa que invalidate_connections descarta as conexões de outras threads."""
+        opened = []
+        ready, invalidated = threading.Event(), threading.Event()
+
+        def worker():
+            opened.append(get_connection(mem_db_uri))
+            ready.set()
+            invalidated.wait(5)
+            opened.append(get_connection(mem_db_uri))
+            close_connections()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        main_conn = get_connection(mem_db_uri)
+        ready.wait(5)
+
+        invalidate_connections(mem_db_uri)
+        invalidated.set()
+        thread.join()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            main_conn.execute("SELECT 1")
+        with pytest.raises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+        assert opened[1] is not opened[0]
+        assert get_connection(mem_db_uri) is not main_conn
+
+
+class TestDashboardTeardown:
+    """Testes de init_db_connections (dashboard)."""
+
+    def test_connections_closed_after_request(self, mem_db_uri):
+        """Testa que as conexões da thread são fechadas no teardown da requisição."""
+        app = Flask(__name__)
+        init_db_connections(app)
+
+        with app.app_context():
+            conn = get_connection(mem_db_uri)
+            assert get_connection(mem_db_uri) is conn
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        assert get_connection(mem_db_uri) is not conn
+
+
+class TestCheckpointWal:
+    """Testes de checkpoint_wal."""
+
+    def test_truncates_wal_file(self, tmp_path):
+        """Testa que o arquivo -wal é truncado após o checkpoint."""
+        db_path = tmp_path / "wal.db"
+        init_database(str(db_path))
+        conn = get_connection(db_path)
+        conn.executemany(
+            "INSERT INTO validation_errors (id, source_file, error_type, error_message) "
+            "VALUES (?, 'f', 'T', 'm')",
+            [(str(i),) for i in range(500)]
+        )
+        conn.commit()
+        wal_file = tmp_path / "wal.db-wal"
+        assert wal_file.stat().st_size > 0
+
+        checkpoint_wal(conn)
+
+        assert wal_file.stat().st_size == 0
@@ -0,0 +1,117 @@
+"""
+Testes para o cache TTL das páginas do dashboard.
+"""
+
+import pytest
+from flask import Flask, flash
+
+from src.dashboard import cache as dashboard_cache
+from src.dashboard.cache import TTLCache, init_cache, cached_view, bust_cache
+
+
+class TestTTLCache:
+    """Testes de TTLCache."""
+
+    def test_get_missing_returns_none(self):
+        """Testa chave ausente."""
+        assert TTLCache().get("x") is None
+
+    def test_set_and_get(self):
+        """Testa armazenamento e leitura."""
+        cache = TTLCache()
+        cache.set("x", "page")
+        assert cache.get("x") == "page"
+
+    def test_entry_expires(self, monkeypatch):
+        """Testa expiração após o TTL."""
+        now = [1000.0]
+        monkeypatch.setattr(dashboard_cache.time, "monotonic", lambda: now[0])
+        cache = TTLCache(ttl=60)
+        cache.set("x", "page")
+
+        now[0] += 59
+        assert cache.get("x") == "page"
+
+        now[0] += 1
+        assert cache.get("x") is None
+        assert len(cache) == 0
+
+    def test_maxsize_evicts_oldest(self):
+        """Testa descarte da entrada mais antiga quando cheio."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+
+@pytest.fixture
+def app():
+    """App mínimo com uma view cacheada que conta execuções."""
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test"
+    init_cache(app)
+    app.calls = 0
+
+    @app.route("/page")
+    @cached_view
+    def page():
+        app.calls += 1
+        return f"render {app.calls}"
+
+    @app.route("/write", methods=["POST"])
+    def write():
+        return "ok"
+
+    @app.route("/notify", methods=["POST"])
+    def notify():
+        flash("feito")
+        return "ok"
+
+    return app
+
+
+class TestCachedView:
+    """Testes do decorator cached_view."""
+
+    def test_second_request_is_cached(self, app):
+        """Testa que a view só é executada uma vez."""
+        client = app.test_client()
+        assert client.get("/page").get_data(as_text=True) == "render 1"
+        assert client.get("/page").get_data(as_text=True) == "render 1"
+        assert app.calls == 1
+
+    def test_query_string_is_part_of_key(self, app):
+        """Testa que parâmetros diferentes geram entradas diferentes."""
+        client = app.test_client()
+        client.get("/page?a=1")
+        client.get("/page?a=2")
+        assert app.calls == 2
+
+    def test_post_busts_cache(self, app):
+        """Testa invalidação após requisição de escrita."""
+        client = app.test_client()
+        client.get("/page")
+        client.post("/write")
+        assert client.get("/page").get_data(as_text=True) == "render 2"
+
+    def test_bust_cache(self, app):
+        """Testa invalidação explícita."""
+        client = app.test_client()
+        client.get("/page")
+        bust_cache(app)
+        client.get("/page")
+        assert app.calls == 2
+
+    def test_pending_flash_bypasses_cache(self, app):
+        """Testa que a página não vem do cache com mensagens flash pendentes."""
+        client = app.test_client()
+        client.get("/page")
+        client.post("/notify")
+        client.get("/page")
+        # Após o POST o cache foi invalidado; com flash pendente não é gravado
+        client.get("/page")
+        assert app.calls == 3
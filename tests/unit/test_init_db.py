@@ -0,0 +1,77 @@
+"""
+Testes para clear_tables (limpeza do banco usada pelo dashboard).
+"""
+
+import sqlite3
+
+import pytest
+
+from src.etl.connection import get_connection
+from src.etl.init_db import init_database, clear_tables
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Banco em arquivo (WAL) com um evento e uma sessão."""
+    path = tmp_path / "clear.db"
+    init_database(str(path))
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO events (id, case_id, student_hash, task_id, activity, event_type, timestamp) "
+        "VALUES ('e1', 'c', 'h', 't', 'a', 'ExecEvent', '2024-01-01T00:00:00')"
+    )
+    conn.execute(
+        "INSERT INTO sessions (id, case_id, student_hash, task_id, "
+        "start_timestamp, end_timestamp, duration_seconds) "
+        "VALUES ('s1', 'c', 'h', 't', 'a', 'b', 0)"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestClearTables:
+    """Testes de clear_tables."""
+
+    def test_clears_given_tables(self, db_path):
+        """Testa que só as tabelas informadas são esvaziadas."""
+        conn = get_connection(db_path)
+        clear_tables(conn, ("events",))
+
+        assert _count(conn, "events") == 0
+        assert _count(conn, "sessions") == 1
+
+    def test_clears_all_tables(self, db_path):
+        """Testa que sem lista todas as tabelas são esvaziadas."""
+        conn = get_connection(db_path)
+        tables = clear_tables(conn)
+
+        assert {"events", "sessions", "metrics"} <= set(tables)
+        assert _count(conn, "events") == _count(conn, "sessions") == 0
+
+    def test_failure_rolls_back_and_releases_lock(self, db_path):
+        """Testa que falha no meio da limpeza desfaz tudo e não segura o lock."""
+        conn = get_connection(db_path)
+        conn.execute(
+            "CREATE TRIGGER block_session_delete BEFORE DELETE ON sessions "
+            "BEGIN SELECT RAISE(ABORT, 'delete blocked'); END"
+        )
+        conn.commit()
+
+        with pytest.raises(sqlite3.IntegrityError, match="delete blocked"):
+            clear_tables(conn, ("events", "sessions"))
+
+        assert not conn.in_transaction
+        assert _count(conn, "events") == 1
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 0
+
+        # Outra conexão consegue escrever (a conexão em cache não ficou com o lock)
+        other = sqlite3.connect(db_path, timeout=0.2)
+        other.execute("DELETE FROM events")
+        other.commit()
+        other.close()
+        assert _count(conn, "events") == 0
@@ -4,20 +4,23 @@ Testes para SQLiteLoader.
 Testa carregamento de eventos no banco de dados SQLite.
 """
 
+import sys
+import json
+import shutil
 import pytest
 import sqlite3
 from datetime import datetime, timedelta
 
-from src.etl.init_db import init_database
-from src.etl.loader import SQLiteLoader, LoadError
+from src.etl.loader import SQLiteLoader, LoadError, _metadata_serializer
+from src.etl.session_detector import SessionError
 from src.models import ExecEvent, MoveEvent, SelfEvent
 
 
 @pytest.fixture
-def temp_db(tmp_path):
-    """Fixture para criar banco de dados temporário."""
+def temp_db(empty_db_template, tmp_path):
+    """Fixture para criar banco de dados temporário (cópia do banco modelo)."""
     db_path = tmp_path / "test.db"
-    init_database(str(db_path))
+    shutil.copyfile(empty_db_template, db_path)
     return db_path
 
 
@@ -43,10 +46,8 @@ class TestSQLiteLoaderInitialization:
         """Testa erro ao criar loader com banco inexistente."""
         db_path = tmp_path / "nonexistent.db"
         
-        with pytest.raises(LoadError) as exc_info:
+        with pytest.raises(LoadError, match=r"(?i)not found"):
             SQLiteLoader(str(db_path))
-        
-        assert "not found" in str(exc_info.value).lower()
     
     def test_loader_custom_batch_size(self, temp_db):
         """Testa loader com batch_size customizado."""
@@ -204,6 +205,31 @@ class TestEventMapping:
         assert metadata["study_minutes"] == 120
 
 
+class TestMetadataSerializer:
+    """Testes do serializador de metadata (orjson opcional)."""
+    
+    METADATA = {"version": 1, "mode": "FULL", "rate": 85, "error": None,
+                "help_sources": ["colega", "ação"], "has_help": True}
+    
+    def test_stdlib_fallback_without_orjson(self, monkeypatch):
+        """Testa o fallback para json quando orjson não está instalado."""
+        monkeypatch.setitem(sys.modules, "orjson", None)  # import orjson -> ImportError
+        dumps = _metadata_serializer()
+        
+        text = dumps(self.METADATA)
+        
+        assert text == '{"version":1,"mode":"FULL","rate":85,"error":null,"help_sources":["colega","ação"],"has_help":true}'
+        assert json.loads(text) == self.METADATA
+    
+    def test_orjson_matches_fallback(self, monkeypatch):
+        """Testa que orjson e o fallback geram o mesmo texto."""
+        pytest.importorskip("orjson")
+        fast = _metadata_serializer()
+        monkeypatch.setitem(sys.modules, "orjson", None)
+        
+        assert fast(self.METADATA) == _metadata_serializer()(self.METADATA)
+
+
 class TestDuplicateHandling:
     """Testes para tratamento de duplicatas."""
     
@@ -405,6 +431,55 @@ class TestEventRetrieval:
         assert loaded[2]["task_id"] == "task_003"
 
 
+class TestLoadEventsWithSessions:
+    """Testes para carga de eventos e sessões em uma passada."""
+    
+    @pytest.fixture
+    def two_session_events(self):
+        """Três eventos na task_001 e, após um gap de 2h, dois na task_002."""
+        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        return [
+            ExecEvent(timestamp=base_time, task_id="task_001", mode="FULL", rate=50, size=100),
+            MoveEvent(timestamp=base_time + timedelta(minutes=5), task_id="task_001", action="EDIT"),
+            ExecEvent(timestamp=base_time + timedelta(minutes=10), task_id="task_001", mode="FULL", rate=100, size=100),
+            MoveEvent(timestamp=base_time + timedelta(hours=2), task_id="task_002", action="PICK"),
+            ExecEvent(timestamp=base_time + timedelta(hours=2, minutes=1), task_id="task_002", mode="FULL", rate=0, size=10),
+        ]
+    
+    def test_events_stamped_with_session_id(self, loader, detector, two_session_events):
+        """Testa que cada evento recebe o session_id da sessão detectada."""
+        count = loader.load_events_with_sessions(
+            two_session_events, "aluno_020", detector, case_id="case_ws"
+        )
+        
+        assert count == 5
+        assert loader.sessions_loaded == 2
+        
+        expected = detector.detect_sessions(two_session_events, "case_ws", "aluno_020")
+        events = loader.get_events(case_id="case_ws")
+        assert [e["session_id"] for e in events] == [expected[0].id] * 3 + [expected[1].id] * 2
+        
+        conn = sqlite3.connect(loader.db_path)
+        rows = conn.execute("SELECT id, event_count FROM sessions ORDER BY start_timestamp").fetchall()
+        conn.close()
+        assert rows == [(expected[0].id, 3), (expected[1].id, 2)]
+    
+    def test_reload_skips_events_and_sessions(self, loader, detector, two_session_events):
+        """Testa que recarregar não duplica eventos nem sessões."""
+        loader.load_events_with_sessions(two_session_events, "aluno_020", detector, case_id="case_ws")
+        loader.load_events_with_sessions(two_session_events, "aluno_020", detector, case_id="case_ws")
+        
+        assert loader.events_skipped == 5
+        assert loader.sessions_loaded == 0
+        assert loader.get_event_count() == 5
+    
+    def test_unsorted_events_rejected(self, loader, detector, two_session_events):
+        """Testa que eventos fora de ordem não são gravados."""
+        with pytest.raises(SessionError):
+            loader.load_events_with_sessions(two_session_events[::-1], "aluno_020", detector)
+        assert loader.get_event_count() == 0
+
+
 class TestDatabaseIntegrity:
     """Testes de integridade do banco."""
     
@@ -422,5 +497,6 @@ class TestDatabaseIntegrity:
         
         # Verifica índices principais
         assert "idx_events_case_timestamp" in indexes
-        assert "idx_events_student" in indexes
-        assert "idx_events_task" in indexes
+        assert "idx_events_case_task_ts" in indexes
+        assert "idx_events_student_ts" in indexes
+        assert "idx_events_task_student" in indexes
@@ -4,39 +4,95 @@ Testes para LogParser.
 Testa parsing de arquivos CSV TKO em modelos Pydantic validados.
 """
 
+import io
 import csv
 import pytest
-from pathlib import Path
 
 from src.parsers import LogParser
 from src.parsers.log_parser import ParseError
 from src.models import ExecEvent, MoveEvent, SelfEvent
 
+pytestmark = pytest.mark.xdist_group("log_parser")
 
-@pytest.fixture
-def temp_csv(tmp_path):
-    """Fixture para criar arquivos CSV temporários."""
-    def _make_csv(lines: list[dict]) -> Path:
-        filepath = tmp_path / "test.csv"
-        
-        if lines:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=lines[0].keys())
-                writer.writeheader()
-                writer.writerows(lines)
-        else:
-            # CSV vazio
-            filepath.write_text("")
-        
-        return filepath
-    return _make_csv
+
+# Linha CSV com todas as colunas possíveis, vazias (base para eventos mistos)
+ROW_TEMPLATE = dict.fromkeys([
+    'timestamp', 'task', 'mode', 'rate', 'size', 'error', 'autonomy',
+    'help_human', 'help_iagen', 'help_guide', 'help_other', 'study'
+], '')
+
+# Arquivo com múltiplos tipos de eventos (todas as linhas partem do template)
+MIXED_LINES = (
+    ROW_TEMPLATE | {'timestamp': '2024-01-15T10:00:00', 'task': 'task_050', 'mode': 'DOWN'},
+    ROW_TEMPLATE | {'timestamp': '2024-01-15T10:01:00', 'task': 'task_050', 'mode': 'PICK'},
+    ROW_TEMPLATE | {'timestamp': '2024-01-15T10:02:00', 'task': 'task_050', 'mode': 'FULL',
+                    'rate': '90', 'size': '150', 'error': 'NONE'},
+    ROW_TEMPLATE | {'timestamp': '2024-01-15T10:05:00', 'task': 'task_050', 'mode': 'FULL',
+                    'rate': '100', 'size': '150', 'error': 'NONE'},
+    ROW_TEMPLATE | {'timestamp': '2024-01-15T10:06:00', 'task': 'task_050', 'mode': 'BACK'},
+    ROW_TEMPLATE | {'timestamp': '2024-01-15T10:10:00', 'task': 'task_050', 'mode': 'SELF',
+                    'rate': '95', 'autonomy': '9', 'study': '30'},
+)
+
+
+def _make_csv_text(lines: list[dict]) -> str:
+    """
+    Monta o conteúdo CSV (cabeçalho + linhas) a partir de dicionários.
+    
+    Usa str.join direto; recorre ao csv.writer (listas, sem o DictWriter)
+    apenas quando algum valor precisa de aspas.
+    """
+    if not lines:
+        return ""
+    
+    fieldnames = list(lines[0])
+    if any(',' in v or '"' in v for row in lines for v in row.values()):
+        buffer = io.StringIO(newline='')
+        writer = csv.writer(buffer)
+        writer.writerow(fieldnames)
+        writer.writerows([[row[k] for k in fieldnames] for row in lines])
+        return buffer.getvalue()
+    
+    rows = [",".join(row[k] for k in fieldnames) for row in lines]
+    return ",".join(fieldnames) + "\n" + "\n".join(rows) + "\n"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_up_parser():
+    """Aquece o parser/modelos uma vez, antes do primeiro teste medido."""
+    LogParser().parse_text("timestamp,task,mode\n2024-01-15T10:00:00,warmup,DOWN\n")
+
+
+@pytest.fixture(scope="session")
+def parser():
+    """Parser strict (padrão) compartilhado por toda a sessão de testes."""
+    return LogParser()
+
+
+@pytest.fixture(scope="session")
+def unvalidated_parser():
+    """Parser sem validação Pydantic, para testes que só verificam o formato dos eventos."""
+    return LogParser(validate=False)
+
+
+@pytest.fixture(scope="session")
+def lenient_parser():
+    """Parser não-strict compartilhado por toda a sessão de testes."""
+    return LogParser(strict=False)
+
+
+@pytest.fixture(scope="session")
+def mixed_events(unvalidated_parser):
+    """Eventos de MIXED_LINES, parseados uma única vez e compartilhados (somente leitura)."""
+    return tuple(unvalidated_parser.parse_text(_make_csv_text(list(MIXED_LINES))))
 
 
 class TestLogParserExecEvents:
     """Testes para parsing de ExecEvent."""
     
-    def test_parse_exec_full_mode(self, temp_csv):
-        """Testa parsing de evento FULL com rate."""
+    @pytest.mark.parametrize("parser_fixture", ["parser", "unvalidated_parser"])
+    def test_parse_exec_full_mode(self, request, parser_fixture):
+        """Testa parsing de evento FULL com rate (rate/size convertidos para int)."""
         lines = [{
             'timestamp': '2024-01-15T10:30:00',
             'task': 'task_001',
@@ -46,17 +102,15 @@ class TestLogParserExecEvents:
             'error': 'NONE'
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = request.getfixturevalue(parser_fixture).parse_text(_make_csv_text(lines))
         
         assert len(events) == 1
-        assert isinstance(events[0], ExecEvent)
-        assert events[0].mode == 'FULL'
-        assert events[0].rate == 85
-        assert events[0].size == 120
-        assert events[0].error == 'NONE'
+        e = events[0]
+        assert isinstance(e, ExecEvent)
+        assert (e.mode, e.rate, e.size, e.error) == ('FULL', 85, 120, 'NONE')
+        assert type(e.rate) is int and type(e.size) is int
     
-    def test_parse_exec_free_mode_no_rate(self, temp_csv):
+    def test_parse_exec_free_mode_no_rate(self, unvalidated_parser):
         """Testa parsing de FREE sem rate (válido)."""
         lines = [{
             'timestamp': '2024-01-15T10:30:00',
@@ -67,14 +121,13 @@ class TestLogParserExecEvents:
             'error': 'NONE'
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = unvalidated_parser.parse_text(_make_csv_text(lines))
         
         assert len(events) == 1
         assert events[0].mode == 'FREE'
         assert events[0].rate is None
     
-    def test_parse_exec_with_error(self, temp_csv):
+    def test_parse_exec_with_error(self, unvalidated_parser):
         """Testa parsing com campo error."""
         lines = [{
             'timestamp': '2024-01-15T10:35:00',
@@ -85,12 +138,11 @@ class TestLogParserExecEvents:
             'error': 'COMP'
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = unvalidated_parser.parse_text(_make_csv_text(lines))
         
         assert events[0].error == 'COMP'
     
-    def test_parse_exec_invalid_rate_for_full(self, temp_csv):
+    def test_parse_exec_invalid_rate_for_full(self, parser):
         """Testa que FULL sem rate falha na validação Pydantic."""
         lines = [{
             'timestamp': '2024-01-15T10:30:00',
@@ -101,31 +153,45 @@ class TestLogParserExecEvents:
             'error': 'NONE'
         }]
         
-        parser = LogParser(strict=True)
+        with pytest.raises(ParseError, match=r"(?i)rate"):
+            parser.parse_text(_make_csv_text(lines))
+    
+    def test_unvalidated_parser_skips_model_validation(self, unvalidated_parser):
+        """Testa que validate=False constrói o evento sem validar (FULL sem rate)."""
+        lines = [{
+            'timestamp': '2024-01-15T10:30:00',
+            'task': 'task_005',
+            'mode': 'FULL',
+            'rate': '',
+            'size': '100',
+            'error': 'NONE'
+        }]
+        
+        events = unvalidated_parser.parse_text(_make_csv_text(lines))
         
-        with pytest.raises(ParseError) as exc_info:
-            parser.parse_file(temp_csv(lines))
+        assert isinstance(events[0], ExecEvent)
+        assert events[0].rate is None
 
 
 class TestLogParserMoveEvents:
     """Testes para parsing de MoveEvent."""
     
-    def test_parse_move_down(self, temp_csv):
-        """Testa parsing de evento DOWN."""
+    @pytest.mark.parametrize("action", ['DOWN', 'PICK', 'BACK', 'EDIT'])
+    def test_parse_move_action(self, unvalidated_parser, action):
+        """Testa parsing de cada ação de movimento isoladamente."""
         lines = [{
             'timestamp': '2024-01-15T11:00:00',
             'task': 'task_010',
-            'mode': 'DOWN'
+            'mode': action
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = unvalidated_parser.parse_text(_make_csv_text(lines))
         
         assert len(events) == 1
         assert isinstance(events[0], MoveEvent)
-        assert events[0].action == 'DOWN'
+        assert events[0].action == action
     
-    def test_parse_all_move_actions(self, temp_csv):
+    def test_parse_all_move_actions(self, unvalidated_parser):
         """Testa parsing de todas as ações de movimento."""
         lines = [
             {'timestamp': '2024-01-15T11:00:00', 'task': 'task_010', 'mode': 'DOWN'},
@@ -134,18 +200,17 @@ class TestLogParserMoveEvents:
             {'timestamp': '2024-01-15T11:03:00', 'task': 'task_013', 'mode': 'EDIT'},
         ]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = unvalidated_parser.parse_text(_make_csv_text(lines))
         
         assert len(events) == 4
-        assert all(isinstance(e, MoveEvent) for e in events)
+        assert {type(e) for e in events} == {MoveEvent}
         assert [e.action for e in events] == ['DOWN', 'PICK', 'BACK', 'EDIT']
 
 
 class TestLogParserSelfEvents:
     """Testes para parsing de SelfEvent."""
     
-    def test_parse_self_minimal(self, temp_csv):
+    def test_parse_self_minimal(self, unvalidated_parser):
         """Testa parsing de SELF com campos mínimos."""
         lines = [{
             'timestamp': '2024-01-15T12:00:00',
@@ -160,17 +225,16 @@ class TestLogParserSelfEvents:
             'study': '0'
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = unvalidated_parser.parse_text(_make_csv_text(lines))
         
         assert len(events) == 1
-        assert isinstance(events[0], SelfEvent)
-        assert events[0].rate == 90
-        assert events[0].autonomy == 8
-        assert events[0].has_any_help() is False
+        e = events[0]
+        assert isinstance(e, SelfEvent)
+        assert (e.rate, e.autonomy, e.has_any_help()) == (90, 8, False)
     
-    def test_parse_self_with_help(self, temp_csv):
-        """Testa parsing de SELF com ajuda."""
+    @pytest.mark.parametrize("parser_fixture", ["parser", "unvalidated_parser"])
+    def test_parse_self_with_help(self, request, parser_fixture):
+        """Testa parsing de SELF com ajuda (campos vazios viram None)."""
         lines = [{
             'timestamp': '2024-01-15T12:30:00',
             'task': 'task_021',
@@ -179,22 +243,22 @@ class TestLogParserSelfEvents:
             'autonomy': '5',
             'help_human': 'professor_colega',  # Texto descrevendo ajuda
             'help_iagen': 'gpt_copilot',       # Texto descrevendo ajuda de IA
-            'help_guide': '',
-            'help_other': '',
+            'help_guide': '',                  # Vazio = None
+            'help_other': '',                  # Vazio = None
             'study': '120'
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = request.getfixturevalue(parser_fixture).parse_text(_make_csv_text(lines))
         
-        assert events[0].help_human == 'professor_colega'
-        assert events[0].help_iagen == 'gpt_copilot'
-        assert events[0].help_guide is None
-        assert events[0].help_other is None
-        assert events[0].has_any_help() is True
-        assert events[0].study_minutes == 120
+        e = events[0]
+        assert isinstance(e, SelfEvent)
+        assert (e.rate, e.autonomy) == (75, 5)
+        assert (e.help_human, e.help_iagen, e.help_guide, e.help_other) == ('professor_colega', 'gpt_copilot', None, None)
+        assert e.has_any_help() is True
+        assert e.study_minutes == 120
     
-    def test_parse_bool_variations(self, temp_csv):
+    @pytest.mark.parametrize("parser_fixture", ["parser", "unvalidated_parser"])
+    def test_parse_bool_variations(self, request, parser_fixture):
         """Testa parsing de variações de help strings."""
         lines = [{
             'timestamp': '2024-01-15T12:30:00',
@@ -209,19 +273,43 @@ class TestLogParserSelfEvents:
             'study': '60'
         }]
         
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
+        events = request.getfixturevalue(parser_fixture).parse_text(_make_csv_text(lines))
         
-        assert events[0].help_human == 'amigo_namorado'
-        assert events[0].help_iagen == 'gpt'
-        assert events[0].help_guide is None
-        assert events[0].help_other is None
+        e = events[0]
+        assert (e.help_human, e.help_iagen, e.help_guide, e.help_other) == ('amigo_namorado', 'gpt', None, None)
+        assert e.has_any_help() is True
+        assert e.study_minutes == 60
+
+
+class TestValidatedAndUnvalidatedParsers:
+    """Compara o caminho validado (padrão) com o model_construct (validate=False)."""
+    
+    @pytest.mark.parametrize("line", [
+        {'timestamp': '2024-01-15T10:30:00', 'task': 'task_060', 'mode': 'FULL',
+         'rate': '85', 'size': '120', 'error': 'comp'},
+        {'timestamp': '2024-01-15T10:31:00', 'task': 'task_060', 'mode': 'FREE',
+         'rate': '', 'size': '50', 'error': ''},
+        {'timestamp': '2024-01-15T10:32:00', 'task': 'task_060', 'mode': 'PICK'},
+        {'timestamp': '2024-01-15T10:33:00', 'task': 'task_060', 'mode': 'SELF',
+         'rate': '70', 'autonomy': '4', 'help_human': 'colega', 'help_iagen': '',
+         'help_guide': '', 'help_other': '', 'study': '45'},
+    ], ids=["exec_full", "exec_free", "move", "self"])
+    def test_same_line_gives_equal_models(self, parser, unvalidated_parser, line):
+        """Testa que os dois caminhos produzem modelos iguais para a mesma linha."""
+        text = _make_csv_text([line])
+        
+        validated = parser.parse_text(text)
+        unvalidated = unvalidated_parser.parse_text(text)
+        
+        assert validated == unvalidated
+        assert type(validated[0]) is type(unvalidated[0])
+        assert validated[0].model_dump() == unvalidated[0].model_dump()
 
 
 class TestLogParserErrorHandling:
     """Testes para tratamento de erros."""
     
-    def test_missing_timestamp(self, temp_csv):
+    def test_missing_timestamp(self, parser):
         """Testa erro quando timestamp está ausente."""
         lines = [{
             'timestamp': '',  # timestamp vazio
@@ -232,13 +320,10 @@ class TestLogParserErrorHandling:
             'error': 'NONE'
         }]
         
-        parser = LogParser(strict=True)
-        
-        with pytest.raises(ParseError) as exc_info:
-            parser.parse_file(temp_csv(lines))
-        assert "timestamp" in str(exc_info.value).lower()
+        with pytest.raises(ParseError, match=r"(?i)timestamp"):
+            parser.parse_text(_make_csv_text(lines))
     
-    def test_missing_task(self, temp_csv):
+    def test_missing_task(self, parser):
         """Testa erro quando task está ausente."""
         lines = [{
             'timestamp': '2024-01-15T10:30:00',
@@ -249,13 +334,10 @@ class TestLogParserErrorHandling:
             'error': 'NONE'
         }]
         
-        parser = LogParser(strict=True)
-        
-        with pytest.raises(ParseError) as exc_info:
-            parser.parse_file(temp_csv(lines))
-        assert "task" in str(exc_info.value).lower()
+        with pytest.raises(ParseError, match=r"(?i)task"):
+            parser.parse_text(_make_csv_text(lines))
     
-    def test_unknown_mode(self, temp_csv):
+    def test_unknown_mode(self, parser):
         """Testa erro com mode desconhecido."""
         lines = [{
             'timestamp': '2024-01-15T10:30:00',
@@ -266,13 +348,10 @@ class TestLogParserErrorHandling:
             'error': 'NONE'
         }]
         
-        parser = LogParser(strict=True)
-        
-        with pytest.raises(ParseError) as exc_info:
-            parser.parse_file(temp_csv(lines))
-        assert "mode" in str(exc_info.value).lower()
+        with pytest.raises(ParseError, match=r"(?i)mode"):
+            parser.parse_text(_make_csv_text(lines))
     
-    def test_non_strict_mode_collects_errors(self, temp_csv):
+    def test_non_strict_mode_collects_errors(self, lenient_parser):
         """Testa que modo não-strict coleta erros sem travar."""
         lines = [
             {'timestamp': '2024-01-15T10:30:00', 'task': 'task_040', 'mode': 'FULL', 'rate': '80', 'size': '100', 'error': 'NONE'},
@@ -280,70 +359,53 @@ class TestLogParserErrorHandling:
             {'timestamp': '2024-01-15T10:32:00', 'task': 'task_042', 'mode': 'FREE', 'rate': '', 'size': '50', 'error': 'NONE'},
         ]
         
-        parser = LogParser(strict=False)
-        events = parser.parse_file(temp_csv(lines))
+        events = lenient_parser.parse_text(_make_csv_text(lines))
         
         # Deve ter parseado 2 eventos válidos
         assert len(events) == 2
-        # Deve ter coletado 1 erro
-        assert len(parser.errors) == 1
-        assert "timestamp" in parser.errors[0].reason.lower()
+        # Deve ter coletado 1 erro (cada parse reinicia o estado do parser)
+        assert len(lenient_parser.errors) == 1
+        assert "timestamp" in lenient_parser.errors[0].reason.lower()
     
-    def test_file_not_found(self):
-        """Testa erro quando arquivo não existe."""
-        parser = LogParser()
+    def test_parse_file_roundtrip(self, parser, tmp_path):
+        """Testa parsing a partir de arquivo em disco (caminho completo de I/O)."""
+        lines = [
+            {'timestamp': '2024-01-15T10:30:00', 'task': 'task_043', 'mode': 'FULL', 'rate': '80', 'size': '100', 'error': 'NONE'},
+            {'timestamp': '2024-01-15T10:31:00', 'task': 'task_043', 'mode': 'PICK', 'rate': '', 'size': '', 'error': ''},
+        ]
         
-        with pytest.raises(FileNotFoundError):
-            parser.parse_file("nonexistent_file.csv")
+        filepath = tmp_path / "roundtrip.csv"
+        filepath.write_text(_make_csv_text(lines), encoding="utf-8")
+        
+        events = parser.parse_file(filepath)
+        
+        assert [type(e) for e in events] == [ExecEvent, MoveEvent]
+        assert events == parser.parse_text(_make_csv_text(lines))
 
 
 class TestLogParserMixedEvents:
     """Testes com múltiplos tipos de eventos."""
     
-    def test_parse_mixed_event_types(self, temp_csv):
+    def test_parse_mixed_event_types(self, mixed_events):
         """Testa parsing de arquivo com múltiplos tipos de eventos."""
-        # Primeira linha define TODOS os campos possíveis
-        lines = [
-            {'timestamp': '2024-01-15T10:00:00', 'task': 'task_050', 'mode': 'DOWN', 
-             'rate': '', 'size': '', 'error': '', 'autonomy': '', 
-             'help_human': '', 'help_iagen': '', 'help_guide': '', 'help_other': '', 'study': ''},
-            {'timestamp': '2024-01-15T10:01:00', 'task': 'task_050', 'mode': 'PICK',
-             'rate': '', 'size': '', 'error': '', 'autonomy': '', 
-             'help_human': '', 'help_iagen': '', 'help_guide': '', 'help_other': '', 'study': ''},
-            {'timestamp': '2024-01-15T10:02:00', 'task': 'task_050', 'mode': 'FULL', 
-             'rate': '90', 'size': '150', 'error': 'NONE', 'autonomy': '', 
-             'help_human': '', 'help_iagen': '', 'help_guide': '', 'help_other': '', 'study': ''},
-            {'timestamp': '2024-01-15T10:05:00', 'task': 'task_050', 'mode': 'FULL', 
-             'rate': '100', 'size': '150', 'error': 'NONE', 'autonomy': '', 
-             'help_human': '', 'help_iagen': '', 'help_guide': '', 'help_other': '', 'study': ''},
-            {'timestamp': '2024-01-15T10:06:00', 'task': 'task_050', 'mode': 'BACK',
-             'rate': '', 'size': '', 'error': '', 'autonomy': '', 
-             'help_human': '', 'help_iagen': '', 'help_guide': '', 'help_other': '', 'study': ''},
-            {'timestamp': '2024-01-15T10:10:00', 'task': 'task_050', 'mode': 'SELF', 
-             'rate': '95', 'size': '', 'error': '', 'autonomy': '9', 
-             'help_human': '', 'help_iagen': '', 'help_guide': '', 'help_other': '', 'study': '30'},
-        ]
-        
-        parser = LogParser()
-        events = parser.parse_file(temp_csv(lines))
-        
-        assert len(events) == 6
+        assert len(mixed_events) == 6
         
         # Verifica tipos
-        assert isinstance(events[0], MoveEvent)
-        assert isinstance(events[1], MoveEvent)
-        assert isinstance(events[2], ExecEvent)
-        assert isinstance(events[3], ExecEvent)
-        assert isinstance(events[4], MoveEvent)
-        assert isinstance(events[5], SelfEvent)
-        
-        # Verifica ordem temporal
-        assert events[0].timestamp < events[-1].timestamp
+        assert isinstance(mixed_events[0], MoveEvent)
+        assert isinstance(mixed_events[1], MoveEvent)
+        assert isinstance(mixed_events[2], ExecEvent)
+        assert isinstance(mixed_events[3], ExecEvent)
+        assert isinstance(mixed_events[4], MoveEvent)
+        assert isinstance(mixed_events[5], SelfEvent)
+    
+    def test_mixed_events_keep_temporal_order(self, mixed_events):
+        """Testa que eventos mistos mantêm a ordem temporal do arquivo."""
+        timestamps = [e.timestamp for e in mixed_events]
+        assert timestamps == sorted(timestamps)
     
-    def test_empty_csv(self, temp_csv):
+    def test_empty_csv(self, parser):
         """Testa parsing de CSV vazio."""
-        parser = LogParser()
-        events = parser.parse_file(temp_csv([]))
+        events = parser.parse_text(_make_csv_text([]))
         
         assert events == []
         assert parser.errors == []
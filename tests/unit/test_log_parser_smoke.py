@@ -0,0 +1,19 @@
+"""
+Testes smoke para LogParser.
+
+Caminhos de erro rápidos, sem fixtures de CSV, para execução com '-m smoke'.
+"""
+
+import pytest
+
+from src.parsers import LogParser
+
+pytestmark = pytest.mark.smoke
+
+
+def test_file_not_found():
+    """Testa erro quando arquivo não existe."""
+    parser = LogParser()
+    
+    with pytest.raises(FileNotFoundError):
+        parser.parse_file("nonexistent_file.csv")
@@ -2,31 +2,31 @@
 Testes para MetricsEngine.
 """
 
+import copy
+import shutil
 import pytest
 from datetime import datetime, timedelta
 
 from src.models.events import ExecEvent, MoveEvent, SelfEvent
 from src.etl.session_detector import SessionDetector
 from src.metrics import MetricsEngine, get_metrics_from_db
-from src.etl.init_db import init_database
 
 
 @pytest.fixture
-def temp_db(tmp_path):
-    """Cria banco temporário para testes."""
+def temp_db(empty_db_template, tmp_path):
+    """Cria banco temporário para testes (cópia do banco modelo)."""
     db_path = tmp_path / "test_metrics.db"
-    init_database(str(db_path))
+    shutil.copyfile(empty_db_template, db_path)
     return str(db_path)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def engine():
-    """Cria engine com configuração padrão."""
+    """Cria engine com configuração padrão (sem estado, compartilhada na sessão)."""
     return MetricsEngine(session_timeout_minutes=30)
 
 
-@pytest.fixture
-def sample_events():
+def _build_sample_events():
     """Cria lista de eventos para testes."""
     base_time = datetime(2024, 1, 15, 10, 0, 0)
     
@@ -68,17 +68,60 @@ def sample_events():
     ]
 
 
-@pytest.fixture
-def sample_sessions(sample_events):
+def _build_sample_sessions(events):
     """Cria sessões a partir dos eventos."""
     detector = SessionDetector(timeout_minutes=30)
     return detector.detect_sessions(
-        sample_events,
+        events,
         case_id="case1",
         student_id="student1"
     )
 
 
+@pytest.fixture(scope="session")
+def sample_events():
+    """Eventos de teste compartilhados na sessão (tupla imutável)."""
+    return tuple(_build_sample_events())
+
+
+@pytest.fixture(scope="session")
+def sample_sessions(sample_events):
+    """Sessões detectadas a partir dos eventos, compartilhadas na sessão."""
+    return tuple(_build_sample_sessions(list(sample_events)))
+
+
+@pytest.fixture(scope="session")
+def sample_self_events(sample_events):
+    """Subconjunto de SelfEvents de sample_events, filtrado uma única vez."""
+    return tuple(e for e in sample_events if isinstance(e, SelfEvent))
+
+
+@pytest.fixture(scope="session")
+def precomputed_metrics(engine, sample_events, sample_sessions):
+    """
+    Calcula as métricas de case1/student1 uma única vez por sessão.
+    
+    Usado pelos testes de persistência e recuperação, que não exercitam o
+    cálculo. Testes que alteram as métricas devem trabalhar sobre uma cópia.
+    """
+    return engine.compute_all_metrics(
+        events=list(sample_events),
+        sessions=list(sample_sessions),
+        case_id="case1",
+        student_id="student1",
+        task_id="calc"
+    )
+
+
+@pytest.fixture(scope="class")
+def populated_db(engine, precomputed_metrics, empty_db_template, tmp_path_factory):
+    """Banco com as métricas de case1 já salvas (somente leitura nos testes)."""
+    db_path = tmp_path_factory.mktemp("populated") / "test_metrics.db"
+    shutil.copyfile(empty_db_template, db_path)
+    engine.save_metrics(precomputed_metrics, str(db_path))
+    return str(db_path)
+
+
 class TestMetricsEngineInitialization:
     """Testes de inicialização."""
     
@@ -202,61 +245,32 @@ class TestPerformanceMetrics:
         assert trajectory[0]["attempt"] == 1
         assert trajectory[2]["attempt"] == 3
     
-    def test_trajectory_pattern_steady_improvement(self, engine):
-        """Testa detecção de padrão steady_improvement."""
-        trajectory = [
-            {"timestamp": "2024-01-15T10:00:00", "rate": 25, "attempt": 1},
-            {"timestamp": "2024-01-15T10:10:00", "rate": 50, "attempt": 2},
-            {"timestamp": "2024-01-15T10:20:00", "rate": 75, "attempt": 3},
-            {"timestamp": "2024-01-15T10:30:00", "rate": 100, "attempt": 4},
-        ]
-        
-        pattern = engine._analyze_trajectory_pattern(trajectory)
-        
-        assert pattern["pattern"] == "steady_improvement"
-        assert pattern["improvement_rate"] > 0
-    
-    def test_trajectory_pattern_instant(self, engine):
-        """Testa detecção de sucesso instantâneo."""
-        trajectory = [
-            {"timestamp": "2024-01-15T10:00:00", "rate": 100, "attempt": 1},
-        ]
-        
-        pattern = engine._analyze_trajectory_pattern(trajectory)
-        
-        assert pattern["pattern"] == "instant"
-        assert pattern["improvement_rate"] is None
-    
-    def test_trajectory_pattern_plateau(self, engine):
-        """Testa detecção de plateau."""
-        # Plateau com progresso inicial mas depois estagnação
-        trajectory = [
-            {"timestamp": "2024-01-15T10:00:00", "rate": 30, "attempt": 1},
-            {"timestamp": "2024-01-15T10:10:00", "rate": 50, "attempt": 2},
-            {"timestamp": "2024-01-15T10:20:00", "rate": 50, "attempt": 3},
-            {"timestamp": "2024-01-15T10:30:00", "rate": 50, "attempt": 4},
-            {"timestamp": "2024-01-15T10:40:00", "rate": 50, "attempt": 5},
-            {"timestamp": "2024-01-15T10:50:00", "rate": 50, "attempt": 6},
-        ]
-        
-        pattern = engine._analyze_trajectory_pattern(trajectory)
-        
-        assert pattern["pattern"] == "plateau"
-        assert pattern["improvement_rate"] == 0
-    
-    def test_trajectory_pattern_erratic(self, engine):
-        """Testa detecção de padrão errático."""
+    @pytest.mark.parametrize(
+        "rates, expected_pattern, improvement_check",
+        [
+            ([25, 50, 75, 100], "steady_improvement", lambda r: r > 0),
+            ([100], "instant", lambda r: r is None),
+            # Plateau com progresso inicial mas depois estagnação
+            ([30, 50, 50, 50, 50, 50], "plateau", lambda r: r == 0),
+            ([25, 75, 30, 85], "erratic", lambda r: True),
+        ],
+        ids=["steady_improvement", "instant", "plateau", "erratic"]
+    )
+    def test_trajectory_pattern(self, engine, rates, expected_pattern, improvement_check):
+        """Testa detecção do padrão de trajetória."""
         trajectory = [
-            {"timestamp": "2024-01-15T10:00:00", "rate": 25, "attempt": 1},
-            {"timestamp": "2024-01-15T10:10:00", "rate": 75, "attempt": 2},
-            {"timestamp": "2024-01-15T10:20:00", "rate": 30, "attempt": 3},
-            {"timestamp": "2024-01-15T10:30:00", "rate": 85, "attempt": 4},
+            {
+                "timestamp": f"2024-01-15T10:{10 * i:02d}:00",
+                "rate": rate,
+                "attempt": i + 1
+            }
+            for i, rate in enumerate(rates)
         ]
         
         pattern = engine._analyze_trajectory_pattern(trajectory)
         
-        assert pattern["pattern"] == "erratic"
-
+        assert pattern["pattern"] == expected_pattern
+        assert improvement_check(pattern["improvement_rate"])
 
 class TestBehavioralMetrics:
     """Testes de métricas comportamentais."""
@@ -376,11 +390,11 @@ class TestSelfAssessmentMetrics:
         assert autonomy_metric is not None
         assert autonomy_metric.metric_value == 8.0
     
-    def test_help_effectiveness_with_success(self, engine, sample_events):
+    def test_help_effectiveness_with_success(self, engine, sample_events, sample_self_events):
         """Testa help_effectiveness quando teve sucesso."""
         effectiveness = engine._compute_help_effectiveness(
             sample_events,
-            [e for e in sample_events if isinstance(e, SelfEvent)]
+            sample_self_events
         )
         
         # Recebeu ajuda E teve sucesso → 1.0
@@ -443,51 +457,40 @@ class TestMetricsIntegration:
         assert metrics == []
 
 
+@pytest.mark.usefixtures("reuse_sqlite_connections")
 class TestMetricsPersistence:
     """Testes de persistência de métricas."""
     
-    def test_save_metrics(self, engine, sample_events, sample_sessions, temp_db):
+    def test_save_metrics(self, engine, precomputed_metrics, temp_db):
         """Testa salvamento de métricas no banco."""
-        metrics = engine.compute_all_metrics(
-            events=sample_events,
-            sessions=sample_sessions,
-            case_id="case1",
-            student_id="student1",
-            task_id="calc"
-        )
+        metrics = precomputed_metrics
         
         inserted = engine.save_metrics(metrics, temp_db)
         
         assert inserted > 0
         assert inserted == len(metrics)
     
-    def test_save_empty_metrics(self, engine, temp_db):
+    def test_save_empty_metrics(self, engine, mem_db_uri):
         """Testa salvamento de lista vazia."""
-        inserted = engine.save_metrics([], temp_db)
+        inserted = engine.save_metrics([], mem_db_uri)
         assert inserted == 0
     
-    def test_save_metrics_replace(self, engine, sample_events, sample_sessions, temp_db):
+    def test_save_metrics_replace(self, engine, precomputed_metrics, mem_db_uri):
         """Testa que métricas duplicadas são substituídas (REPLACE)."""
-        metrics = engine.compute_all_metrics(
-            events=sample_events,
-            sessions=sample_sessions,
-            case_id="case1",
-            student_id="student1",
-            task_id="calc"
-        )
+        metrics = copy.deepcopy(precomputed_metrics)
         
         # Primeira inserção
-        inserted1 = engine.save_metrics(metrics, temp_db)
+        inserted1 = engine.save_metrics(metrics, mem_db_uri)
         
         # Modifica valor de uma métrica
         metrics[0].metric_value = 999.0
         
         # Segunda inserção (deve fazer REPLACE)
-        inserted2 = engine.save_metrics(metrics, temp_db)
+        inserted2 = engine.save_metrics(metrics, mem_db_uri)
         
         # Verifica que valor foi atualizado
         retrieved = get_metrics_from_db(
-            temp_db,
+            mem_db_uri,
             case_id="case1",
             metric_name=metrics[0].metric_name
         )
@@ -496,35 +499,20 @@ class TestMetricsPersistence:
         assert retrieved[0]["metric_value"] == 999.0
 
 
+@pytest.mark.usefixtures("reuse_sqlite_connections")
 class TestMetricsRetrieval:
     """Testes de recuperação de métricas."""
     
-    def test_get_all_metrics(self, engine, sample_events, sample_sessions, temp_db):
+    def test_get_all_metrics(self, precomputed_metrics, populated_db):
         """Testa recuperação de todas métricas."""
-        metrics = engine.compute_all_metrics(
-            events=sample_events,
-            sessions=sample_sessions,
-            case_id="case1",
-            student_id="student1",
-            task_id="calc"
-        )
-        engine.save_metrics(metrics, temp_db)
-        
-        retrieved = get_metrics_from_db(temp_db)
+        retrieved = get_metrics_from_db(populated_db)
         
-        assert len(retrieved) == len(metrics)
+        assert len(retrieved) == len(precomputed_metrics)
     
-    def test_get_metrics_by_case(self, engine, sample_events, sample_sessions, temp_db):
+    def test_get_metrics_by_case(self, engine, precomputed_metrics, sample_events, sample_sessions, mem_db_uri):
         """Testa filtro por case_id."""
         # Case1
-        metrics1 = engine.compute_all_metrics(
-            events=sample_events,
-            sessions=sample_sessions,
-            case_id="case1",
-            student_id="student1",
-            task_id="calc"
-        )
-        engine.save_metrics(metrics1, temp_db)
+        metrics1 = precomputed_metrics
         
         # Case2
         metrics2 = engine.compute_all_metrics(
@@ -534,45 +522,29 @@ class TestMetricsRetrieval:
             student_id="student2",
             task_id="calc"
         )
-        engine.save_metrics(metrics2, temp_db)
+        
+        # Uma única inserção em lote com os dois cases
+        engine.save_metrics(metrics1 + metrics2, mem_db_uri)
         
         # Recupera apenas case1
-        retrieved = get_metrics_from_db(temp_db, case_id="case1")
+        retrieved = get_metrics_from_db(mem_db_uri, case_id="case1")
         
         assert len(retrieved) == len(metrics1)
         assert all(m["case_id"] == "case1" for m in retrieved)
     
-    def test_get_metrics_by_name(self, engine, sample_events, sample_sessions, temp_db):
+    def test_get_metrics_by_name(self, populated_db):
         """Testa filtro por metric_name."""
-        metrics = engine.compute_all_metrics(
-            events=sample_events,
-            sessions=sample_sessions,
-            case_id="case1",
-            student_id="student1",
-            task_id="calc"
-        )
-        engine.save_metrics(metrics, temp_db)
-        
         # Recupera apenas time_active
         retrieved = get_metrics_from_db(
-            temp_db,
+            populated_db,
             metric_name="time_active_seconds"
         )
         
         assert len(retrieved) == 1
         assert retrieved[0]["metric_name"] == "time_active_seconds"
     
-    def test_get_metrics_with_limit(self, engine, sample_events, sample_sessions, temp_db):
+    def test_get_metrics_with_limit(self, populated_db):
         """Testa limite de resultados."""
-        metrics = engine.compute_all_metrics(
-            events=sample_events,
-            sessions=sample_sessions,
-            case_id="case1",
-            student_id="student1",
-            task_id="calc"
-        )
-        engine.save_metrics(metrics, temp_db)
-        
-        retrieved = get_metrics_from_db(temp_db, limit=5)
+        retrieved = get_metrics_from_db(populated_db, limit=5)
         
         assert len(retrieved) == 5
@@ -2,51 +2,82 @@
 Testes para SessionDetector.
 """
 
+import re
+import shutil
+import sqlite3
 import pytest
+from types import SimpleNamespace
 from datetime import datetime, timedelta
 
 from src.models.events import ExecEvent, MoveEvent, SelfEvent
+from src.etl import session_detector
 from src.etl.session_detector import (
     SessionDetector,
     SessionError,
     get_sessions_from_db
 )
-from src.etl.init_db import init_database
 
+# Instante base fixo usado na construção dos eventos de teste
+_BASE_TIME = datetime(2024, 1, 15, 10, 0, 0)
 
-@pytest.fixture
-def temp_db(tmp_path):
-    """Cria banco temporário para testes."""
-    db_path = tmp_path / "test_sessions.db"
-    init_database(str(db_path))
+# Formato do student_hash: 8 caracteres hexadecimais
+_HEX8 = re.compile(r"[0-9a-f]{8}")
+
+
+# Os eventos de teste são escritos à mão com valores válidos: a validação do
+# Pydantic não está sob teste aqui, então são construídos sem validação.
+def _exec(**fields):
+    """Cria ExecEvent sem validação."""
+    return ExecEvent.model_construct(**fields)
+
+
+def _move(**fields):
+    """Cria MoveEvent sem validação."""
+    return MoveEvent.model_construct(**fields)
+
+
+def _self(**fields):
+    """Cria SelfEvent sem validação."""
+    return SelfEvent.model_construct(**fields)
+
+
+@pytest.fixture(scope="session")
+def _base_db(empty_db_template, tmp_path_factory, xdist_worker):
+    """Banco de sessões compartilhado na sessão (cópia do banco modelo)."""
+    db_path = tmp_path_factory.mktemp(f"sessions_{xdist_worker}") / "test_sessions.db"
+    shutil.copyfile(empty_db_template, db_path)
     return str(db_path)
 
 
 @pytest.fixture
-def detector():
-    """Cria detector com timeout padrão de 30 minutos."""
-    return SessionDetector(timeout_minutes=30)
+def temp_db(_base_db):
+    """Banco de testes com a tabela de sessões vazia."""
+    conn = sqlite3.connect(_base_db)
+    conn.execute("DELETE FROM sessions")
+    conn.commit()
+    conn.close()
+    return _base_db
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_events():
-    """Cria lista de eventos de exemplo para testes."""
-    base_time = datetime(2024, 1, 15, 10, 0, 0)
+    """Cria lista de eventos de exemplo para testes (compartilhada no módulo, não mutar)."""
+    base_time = _BASE_TIME
     
     events = [
-        MoveEvent(
+        _move(
             timestamp=base_time,
             task_id="calculadora",
             action="PICK"
         ),
-        ExecEvent(
+        _exec(
             timestamp=base_time + timedelta(minutes=5),
             task_id="calculadora",
             mode="FULL",
             rate=50,
             size=80
         ),
-        ExecEvent(
+        _exec(
             timestamp=base_time + timedelta(minutes=10),
             task_id="calculadora",
             mode="FULL",
@@ -55,12 +86,12 @@ def sample_events():
         ),
         
         # Gap de 40 minutos (nova sessão)
-        MoveEvent(
+        _move(
             timestamp=base_time + timedelta(minutes=50),
             task_id="calculadora",
             action="EDIT"
         ),
-        ExecEvent(
+        _exec(
             timestamp=base_time + timedelta(minutes=55),
             task_id="calculadora",
             mode="FULL",
@@ -69,25 +100,25 @@ def sample_events():
         ),
         
         # Mudança de tarefa (nova sessão)
-        MoveEvent(
+        _move(
             timestamp=base_time + timedelta(minutes=60),
             task_id="animal",
             action="PICK"
         ),
-        ExecEvent(
+        _exec(
             timestamp=base_time + timedelta(minutes=65),
             task_id="animal",
             mode="FULL",
             rate=100,
             size=50
         ),
-        SelfEvent(
+        _self(
             timestamp=base_time + timedelta(minutes=70),
             task_id="animal",
             rate=100,
             autonomy=9
         ),
-        MoveEvent(
+        _move(
             timestamp=base_time + timedelta(minutes=75),
             task_id="animal",
             action="DOWN"
@@ -97,6 +128,41 @@ def sample_events():
     return events
 
 
+@pytest.fixture(scope="module")
+def detected(detector, sample_events):
+    """Sessões de case1/student1 detectadas uma única vez (somente leitura)."""
+    return detector.detect_sessions(sample_events, case_id="case1", student_id="student1")
+
+
+def _count_sessions(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    conn.close()
+    return count
+
+
+@pytest.fixture(scope="module")
+def populated_db(empty_db_template, tmp_path_factory, detector, detected):
+    """
+    Banco com as sessões de case1 já salvas (somente leitura nos testes).
+    
+    As sessões são salvas duas vezes; os retornos de cada inserção e o total
+    de linhas entre elas ficam expostos para os testes de persistência (a
+    segunda deve ignorar duplicatas).
+    """
+    db_path = str(tmp_path_factory.mktemp("populated") / "test_sessions.db")
+    shutil.copyfile(empty_db_template, db_path)
+    first_insert_count = detector.save_sessions(detected, db_path)
+    rows_after_first = _count_sessions(db_path)
+    second_insert_count = detector.save_sessions(detected, db_path)
+    return SimpleNamespace(
+        path=db_path,
+        first_insert_count=first_insert_count,
+        rows_after_first=rows_after_first,
+        second_insert_count=second_insert_count
+    )
+
+
 class TestSessionDetectorInitialization:
     """Testes de inicialização do detector."""
     
@@ -112,13 +178,11 @@ class TestSessionDetectorInitialization:
         assert detector.timeout_minutes == 15
         assert detector.timeout_delta == timedelta(minutes=15)
     
-    def test_invalid_timeout(self):
+    @pytest.mark.parametrize("bad", [0, -10])
+    def test_invalid_timeout(self, bad):
         """Testa erro com timeout inválido."""
         with pytest.raises(ValueError, match="timeout_minutes must be positive"):
-            SessionDetector(timeout_minutes=0)
-        
-        with pytest.raises(ValueError):
-            SessionDetector(timeout_minutes=-10)
+            SessionDetector(timeout_minutes=bad)
 
 
 class TestSessionDetection:
@@ -126,18 +190,18 @@ class TestSessionDetection:
     
     def test_single_session(self, detector):
         """Testa detecção de sessão única."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),
-            ExecEvent(
+            _move(timestamp=base_time, task_id="task1", action="PICK"),
+            _exec(
                 timestamp=base_time + timedelta(minutes=5),
                 task_id="task1",
                 mode="FULL",
                 rate=75,
                 size=100
             ),
-            ExecEvent(
+            _exec(
                 timestamp=base_time + timedelta(minutes=10),
                 task_id="task1",
                 mode="FULL",
@@ -160,13 +224,9 @@ class TestSessionDetection:
         assert sessions[0].self_count == 0
         assert sessions[0].duration_seconds == 600
     
-    def test_multiple_sessions_by_timeout(self, detector, sample_events):
+    def test_multiple_sessions_by_timeout(self, detected):
         """Testa múltiplas sessões separadas por timeout."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
+        sessions = detected
         
         # Deve detectar 3 sessões
         assert len(sessions) == 3
@@ -188,11 +248,11 @@ class TestSessionDetection:
     
     def test_session_by_task_change(self, detector):
         """Testa nova sessão quando tarefa muda."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),
-            ExecEvent(
+            _move(timestamp=base_time, task_id="task1", action="PICK"),
+            _exec(
                 timestamp=base_time + timedelta(minutes=5),
                 task_id="task1",
                 mode="FULL",
@@ -200,12 +260,12 @@ class TestSessionDetection:
                 size=80
             ),
             # Muda tarefa sem gap grande
-            MoveEvent(
+            _move(
                 timestamp=base_time + timedelta(minutes=6),
                 task_id="task2",
                 action="PICK"
             ),
-            ExecEvent(
+            _exec(
                 timestamp=base_time + timedelta(minutes=10),
                 task_id="task2",
                 mode="FULL",
@@ -237,8 +297,8 @@ class TestSessionDetection:
     
     def test_single_event(self, detector):
         """Testa com evento único."""
-        event = MoveEvent(
-            timestamp=datetime(2024, 1, 15, 10, 0, 0),
+        event = _move(
+            timestamp=_BASE_TIME,
             task_id="task1",
             action="PICK"
         )
@@ -255,11 +315,11 @@ class TestSessionDetection:
     
     def test_events_not_sorted(self, detector):
         """Testa erro quando eventos não estão ordenados."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time + timedelta(minutes=10), task_id="task1", action="PICK"),
-            MoveEvent(timestamp=base_time, task_id="task1", action="EDIT"),  # Fora de ordem
+            _move(timestamp=base_time + timedelta(minutes=10), task_id="task1", action="PICK"),
+            _move(timestamp=base_time, task_id="task1", action="EDIT"),  # Fora de ordem
         ]
         
         with pytest.raises(SessionError, match="Events not sorted"):
@@ -271,11 +331,11 @@ class TestSessionAttributes:
     
     def test_session_id_deterministic(self, detector):
         """Testa que session_id é determinístico."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),
-            ExecEvent(
+            _move(timestamp=base_time, task_id="task1", action="PICK"),
+            _exec(
                 timestamp=base_time + timedelta(minutes=5),
                 task_id="task1",
                 mode="FULL",
@@ -291,41 +351,55 @@ class TestSessionAttributes:
     
     def test_student_hash(self, detector):
         """Testa que student_id é hasheado."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),
+            _move(timestamp=base_time, task_id="task1", action="PICK"),
         ]
         
         sessions = detector.detect_sessions(events, "case1", "student_abc_123")
         
         # Hash deve ser 8 caracteres hex
-        assert len(sessions[0].student_hash) == 8
+        assert _HEX8.fullmatch(sessions[0].student_hash)
         assert sessions[0].student_hash != "student_abc_123"
-        assert all(c in "0123456789abcdef" for c in sessions[0].student_hash)
+    
+    def test_events_not_kept_by_default(self, detected):
+        """Testa que as sessões não guardam a lista de eventos por padrão."""
+        assert all(session.events is None for session in detected)
+    
+    def test_keep_events(self, detector, sample_events):
+        """Testa que keep_events=True preserva os eventos de cada sessão."""
+        sessions = detector.detect_sessions(
+            sample_events, "case1", "student1", keep_events=True
+        )
+        
+        assert [len(session.events) for session in sessions] == [
+            session.event_count for session in sessions
+        ]
+        assert sessions[0].events[0] is sample_events[0]
     
     def test_event_type_counts(self, detector):
         """Testa contadores de tipos de eventos."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),
-            MoveEvent(timestamp=base_time + timedelta(minutes=1), task_id="task1", action="EDIT"),
-            ExecEvent(
+            _move(timestamp=base_time, task_id="task1", action="PICK"),
+            _move(timestamp=base_time + timedelta(minutes=1), task_id="task1", action="EDIT"),
+            _exec(
                 timestamp=base_time + timedelta(minutes=2),
                 task_id="task1",
                 mode="FULL",
                 rate=50,
                 size=80
             ),
-            ExecEvent(
+            _exec(
                 timestamp=base_time + timedelta(minutes=5),
                 task_id="task1",
                 mode="FULL",
                 rate=100,
                 size=90
             ),
-            SelfEvent(
+            _self(
                 timestamp=base_time + timedelta(minutes=10),
                 task_id="task1",
                 rate=100,
@@ -342,70 +416,55 @@ class TestSessionAttributes:
         assert sessions[0].self_count == 1
 
 
+@pytest.mark.slow
 class TestSessionPersistence:
     """Testes de persistência de sessões."""
     
-    def test_save_sessions(self, detector, sample_events, temp_db):
+    def test_save_sessions(self, populated_db):
         """Testa salvamento de sessões no banco."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
-        
-        inserted = detector.save_sessions(sessions, temp_db)
-        
-        assert inserted == 3
+        assert populated_db.first_insert_count == 3
+        assert populated_db.rows_after_first == 3
     
-    def test_save_empty_sessions(self, detector, temp_db):
+    def test_save_empty_sessions(self, detector, mem_db_uri):
         """Testa salvamento de lista vazia."""
-        inserted = detector.save_sessions([], temp_db)
+        inserted = detector.save_sessions([], mem_db_uri)
         assert inserted == 0
     
-    def test_save_duplicate_sessions(self, detector, sample_events, temp_db):
-        """Testa que duplicatas são ignoradas (INSERT OR IGNORE)."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
+    def test_save_sessions_from_generator_in_chunks(
+        self, detector, sample_events, mem_db_uri, monkeypatch
+    ):
+        """Testa salvamento direto de iter_sessions em vários executemany."""
+        monkeypatch.setattr(session_detector, "_SAVE_CHUNK_SIZE", 2)
         
-        # Primeira inserção
-        inserted1 = detector.save_sessions(sessions, temp_db)
-        assert inserted1 == 3
+        sessions = detector.iter_sessions(sample_events, "case1", "student1")
+        inserted = detector.save_sessions(sessions, mem_db_uri)
         
-        # Segunda inserção (duplicatas)
-        inserted2 = detector.save_sessions(sessions, temp_db)
-        assert inserted2 == 0  # Nenhuma inserida
+        assert inserted == 3
+        assert len(get_sessions_from_db(mem_db_uri)) == 3
+    
+    def test_save_duplicate_sessions(self, populated_db):
+        """Testa que duplicatas são ignoradas (INSERT OR IGNORE)."""
+        # Segunda inserção (duplicatas): nada inserido, total de linhas inalterado
+        assert populated_db.second_insert_count == 0
+        assert _count_sessions(populated_db.path) == populated_db.rows_after_first
 
 
+@pytest.mark.slow
 class TestSessionRetrieval:
     """Testes de recuperação de sessões do banco."""
     
-    def test_get_all_sessions(self, detector, sample_events, temp_db):
+    def test_get_all_sessions(self, populated_db):
         """Testa recuperação de todas as sessões."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
-        detector.save_sessions(sessions, temp_db)
-        
-        retrieved = get_sessions_from_db(temp_db)
+        retrieved = get_sessions_from_db(populated_db.path)
         
         assert len(retrieved) == 3
         assert all("id" in s for s in retrieved)
         assert all("task_id" in s for s in retrieved)
     
-    def test_get_sessions_by_case(self, detector, sample_events, temp_db):
+    def test_get_sessions_by_case(self, detector, detected, sample_events, temp_db):
         """Testa filtro por case_id."""
         # Cria sessões para case1
-        sessions1 = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
-        detector.save_sessions(sessions1, temp_db)
+        detector.save_sessions(detected, temp_db)
         
         # Cria sessões para case2
         sessions2 = detector.detect_sessions(
@@ -421,50 +480,27 @@ class TestSessionRetrieval:
         assert len(retrieved) == 3
         assert all(s["case_id"] == "case1" for s in retrieved)
     
-    def test_get_sessions_by_task(self, detector, sample_events, temp_db):
+    def test_get_sessions_by_task(self, populated_db):
         """Testa filtro por task_id."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
-        detector.save_sessions(sessions, temp_db)
-        
         # Recupera apenas sessões de calculadora
-        retrieved = get_sessions_from_db(temp_db, task_id="calculadora")
+        retrieved = get_sessions_from_db(populated_db.path, task_id="calculadora")
         
         assert len(retrieved) == 2  # 2 sessões de calculadora
         assert all(s["task_id"] == "calculadora" for s in retrieved)
     
-    def test_get_sessions_with_limit(self, detector, sample_events, temp_db):
+    def test_get_sessions_with_limit(self, populated_db):
         """Testa limite de resultados."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
-        detector.save_sessions(sessions, temp_db)
-        
-        retrieved = get_sessions_from_db(temp_db, limit=2)
+        retrieved = get_sessions_from_db(populated_db.path, limit=2)
         
         assert len(retrieved) == 2
     
-    def test_sessions_ordered_by_timestamp(self, detector, sample_events, temp_db):
+    def test_sessions_ordered_by_timestamp(self, populated_db):
         """Testa que sessões são ordenadas por timestamp."""
-        sessions = detector.detect_sessions(
-            sample_events,
-            case_id="case1",
-            student_id="student1"
-        )
-        detector.save_sessions(sessions, temp_db)
-        
-        retrieved = get_sessions_from_db(temp_db)
+        retrieved = get_sessions_from_db(populated_db.path)
         
         # Verifica ordenação
-        for i in range(len(retrieved) - 1):
-            ts1 = datetime.fromisoformat(retrieved[i]["start_timestamp"])
-            ts2 = datetime.fromisoformat(retrieved[i + 1]["start_timestamp"])
-            assert ts1 <= ts2
+        timestamps = [datetime.fromisoformat(s["start_timestamp"]) for s in retrieved]
+        assert timestamps == sorted(timestamps)
 
 
 class TestSessionDurationCalculation:
@@ -472,8 +508,8 @@ class TestSessionDurationCalculation:
     
     def test_zero_duration_single_event(self, detector):
         """Testa duração zero com evento único."""
-        event = MoveEvent(
-            timestamp=datetime(2024, 1, 15, 10, 0, 0),
+        event = _move(
+            timestamp=_BASE_TIME,
             task_id="task1",
             action="PICK"
         )
@@ -484,18 +520,18 @@ class TestSessionDurationCalculation:
     
     def test_duration_multiple_events(self, detector):
         """Testa cálculo de duração com múltiplos eventos."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
+        base_time = _BASE_TIME
         
         events = [
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),
-            ExecEvent(
+            _move(timestamp=base_time, task_id="task1", action="PICK"),
+            _exec(
                 timestamp=base_time + timedelta(minutes=7),
                 task_id="task1",
                 mode="FULL",
                 rate=100,
                 size=100
             ),
-            ExecEvent(
+            _exec(
                 timestamp=base_time + timedelta(minutes=15),
                 task_id="task1",
                 mode="FULL",
@@ -0,0 +1,52 @@
+"""
+Benchmarks de SessionDetector.detect_sessions.
+
+Não rodam por padrão: selecione com `pytest -m benchmark` (requer pytest-benchmark).
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from src.models.events import ExecEvent
+from src.etl.session_detector import SessionDetector
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark
+
+_BASE_TIME = datetime(2024, 1, 15, 10, 0, 0)
+
+
+def _gen(n_events, gap_ratio):
+    """
+    Gera n_events ExecEvents sem validação (isola o custo do detector).
+    
+    Uma fração gap_ratio dos intervalos excede o timeout de 30 minutos,
+    forçando a abertura de uma nova sessão.
+    """
+    gap_every = int(1 / gap_ratio) if gap_ratio else 0
+    events = []
+    timestamp = _BASE_TIME
+    for i in range(n_events):
+        step = 45 if gap_every and i % gap_every == 0 else 1
+        timestamp += timedelta(minutes=step)
+        events.append(ExecEvent.model_construct(
+            timestamp=timestamp,
+            task_id="task1",
+            mode="FULL",
+            rate=i % 101,
+            size=10
+        ))
+    return events
+
+
+@pytest.mark.parametrize("gap_ratio", [0.0, 0.1])
+@pytest.mark.parametrize("n_events", [100, 1_000, 10_000])
+def test_detect_sessions_benchmark(benchmark, n_events, gap_ratio):
+    """Mede detect_sessions variando o número de eventos e a fração de gaps."""
+    detector = SessionDetector(timeout_minutes=30)
+    events = _gen(n_events, gap_ratio)
+    
+    sessions = benchmark(detector.detect_sessions, events, "case1", "student1")
+    
+    assert sum(s.event_count for s in sessions) == n_events
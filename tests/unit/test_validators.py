@@ -4,12 +4,17 @@ Testes para EventValidator.
 Testa validações de integridade e consistência de eventos TKO.
 """
 
+import functools
 import pytest
 from datetime import datetime, timedelta
 
 from src.etl import EventValidator, ValidationError, ValidationReport
 from src.models import ExecEvent, MoveEvent, SelfEvent
 
+pytestmark = pytest.mark.xdist_group("validators")
+
+_BASE_TIME = datetime(2024, 1, 15, 10, 0, 0)
+
 
 class TestValidationReport:
     """Testes para ValidationReport."""
@@ -57,226 +62,127 @@ class TestValidationReport:
         assert len(report.errors) == 0
 
 
-class TestTimestampValidation:
-    """Testes para validação de timestamps."""
-    
-    def test_monotonic_timestamps_valid(self):
-        """Testa timestamps em ordem crescente (válido)."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=1), task_id="task1", mode="FULL", rate=90, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=2), task_id="task1", mode="FULL", rate=100, size=100),
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert report.valid_events == 3
-        assert len(report.errors) == 0
-    
-    def test_backwards_timestamp_error(self):
-        """Testa timestamp retroativo (erro por padrão)."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=5), task_id="task1", mode="FULL", rate=90, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=2), task_id="task1", mode="FULL", rate=100, size=100),  # Volta no tempo
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is False
-        assert len(report.errors) == 1
-        assert report.errors[0].error_type == "TIMESTAMP_ORDER"
-        assert report.errors[0].event_index == 2
-    
-    def test_backwards_timestamp_warning_mode(self):
-        """Testa que allow_backwards_time gera warning em vez de erro."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=5), task_id="task1", mode="FULL", rate=90, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=2), task_id="task1", mode="FULL", rate=100, size=100),
-        ]
-        
-        validator = EventValidator(allow_backwards_time=True)
-        report = validator.validate(events)
-        
-        assert report.is_valid is True  # Sem erros bloqueantes
-        assert len(report.warnings) == 1
-        assert report.warnings[0].error_type == "TIMESTAMP_ORDER"
-    
-    def test_same_timestamp_allowed(self):
-        """Testa que timestamps iguais são permitidos (não retroativos)."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            MoveEvent(timestamp=base_time, task_id="task2", action="PICK"),  # Mesmo timestamp, task diferente
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert len(report.errors) == 0
+def _exec(minutes=0, task_id="task1", mode="FULL", rate=80, size=100):
+    """Cria ExecEvent em _BASE_TIME + minutes."""
+    return ExecEvent(
+        timestamp=_BASE_TIME + timedelta(minutes=minutes),
+        task_id=task_id,
+        mode=mode,
+        rate=rate,
+        size=size
+    )
 
 
-class TestDuplicateValidation:
-    """Testes para detecção de duplicatas."""
-    
-    def test_no_duplicates(self):
-        """Testa eventos únicos (sem duplicatas)."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=1), task_id="task1", mode="FULL", rate=90, size=100),
-            MoveEvent(timestamp=base_time + timedelta(minutes=2), task_id="task2", action="PICK"),  # Timestamp posterior
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert len(report.errors) == 0
-    
-    def test_exact_duplicate_detected(self):
-        """Testa detecção de duplicata exata."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=90, size=100),  # Duplicata
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is False
-        assert len(report.errors) == 1
-        assert report.errors[0].error_type == "DUPLICATE"
-        assert report.errors[0].event_index == 1
+@functools.lru_cache(maxsize=None)
+def _cached_validator(options: frozenset) -> EventValidator:
+    return EventValidator(**dict(options))
+
+
+def _validator(**kwargs) -> EventValidator:
+    """Retorna EventValidator compartilhado por configuração (não guarda estado)."""
+    return _cached_validator(frozenset(kwargs.items()))
+
+
+@pytest.fixture(scope="module")
+def default_validator():
+    """Validador com configuração padrão."""
+    return _validator()
+
+
+# Listas de eventos compartilhadas (imutáveis: os testes recebem cópias via list())
+VALID_MONOTONIC = (_exec(0), _exec(1, rate=90), _exec(2, rate=100))
+BACKWARDS_TIME = (_exec(0), _exec(5, rate=90), _exec(2, rate=100))  # Volta no tempo
+EXACT_DUPLICATE = (_exec(0), _exec(0, rate=90))  # Duplicata
+LOW_RATE_SELF = (
+    SelfEvent(timestamp=_BASE_TIME, task_id="task1", rate=30, autonomy=8, study_minutes=60),
+)
+LOW_AUTONOMY_SELF = (
+    SelfEvent(timestamp=_BASE_TIME, task_id="task1", rate=80, autonomy=2, study_minutes=60),
+)
+LOW_RATE_LOW_AUTONOMY_SELF = (
+    SelfEvent(timestamp=_BASE_TIME, task_id="task1", rate=30, autonomy=2, study_minutes=60),
+)
+
+# (eventos, kwargs do validador, erros esperados [(tipo, índice)], tipos de warning esperados)
+VALIDATOR_CASES = [
+    # Timestamps
+    pytest.param(VALID_MONOTONIC, {}, [], [], id="monotonic_timestamps_valid"),
+    pytest.param(BACKWARDS_TIME, {}, [("TIMESTAMP_ORDER", 2)], [], id="backwards_timestamp_error"),
+    pytest.param(
+        BACKWARDS_TIME, {"allow_backwards_time": True}, [], ["TIMESTAMP_ORDER"],
+        id="backwards_timestamp_warning_mode"
+    ),
+    pytest.param(
+        # Mesmo timestamp, task diferente
+        (_exec(0), MoveEvent(timestamp=_BASE_TIME, task_id="task2", action="PICK")),
+        {}, [], [],
+        id="same_timestamp_allowed"
+    ),
+    # Duplicatas
+    pytest.param(
+        (
+            _exec(0),
+            _exec(1, rate=90),
+            MoveEvent(timestamp=_BASE_TIME + timedelta(minutes=2), task_id="task2", action="PICK"),
+        ),
+        {}, [], [],
+        id="no_duplicates"
+    ),
+    pytest.param(EXACT_DUPLICATE, {}, [("DUPLICATE", 1)], [], id="exact_duplicate_detected"),
+    pytest.param(
+        (_exec(0), _exec(0, task_id="task2")),  # Task diferente
+        {}, [], [],
+        id="different_task_not_duplicate"
+    ),
+    pytest.param(
+        # Tipo diferente
+        (_exec(0), MoveEvent(timestamp=_BASE_TIME, task_id="task1", action="PICK")),
+        {}, [], [],
+        id="different_event_type_not_duplicate"
+    ),
+    # Ranges de valores
+    pytest.param((_exec(0, rate=85, size=120),), {}, [], [], id="exec_event_valid_ranges"),
+    pytest.param(
+        (_exec(0, mode="FREE", rate=None),),  # FREE permite rate=None
+        {}, [], [],
+        id="exec_event_free_without_rate"
+    ),
+    pytest.param(LOW_RATE_SELF, {}, [], ["VALUE_WARNING"], id="self_event_low_rate_warning"),
+    pytest.param(
+        LOW_AUTONOMY_SELF, {}, [], ["CONSISTENCY_WARNING"],
+        id="self_event_low_autonomy_no_help_warning"
+    ),
+]
+
+
+@pytest.mark.parametrize("events, kwargs, expected_errors, expected_warnings", VALIDATOR_CASES)
+def test_validator_scenarios(events, kwargs, expected_errors, expected_warnings):
+    """Testa timestamps, duplicatas e ranges de valores por cenário."""
+    events = list(events)
     
-    def test_different_task_not_duplicate(self):
-        """Testa que mesmo timestamp + tipo diferente de task não é duplicata."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time, task_id="task2", mode="FULL", rate=80, size=100),  # Task diferente
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert len(report.errors) == 0
+    report = _validator(**kwargs).validate(events)
     
-    def test_different_event_type_not_duplicate(self):
-        """Testa que mesmo timestamp + task mas tipo diferente não é duplicata."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            MoveEvent(timestamp=base_time, task_id="task1", action="PICK"),  # Tipo diferente
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert len(report.errors) == 0
+    assert [(e.error_type, e.event_index) for e in report.errors] == expected_errors
+    assert [w.error_type for w in report.warnings] == expected_warnings
+    assert report.is_valid is (not expected_errors)
+    assert report.valid_events == len(events) - len({idx for _, idx in expected_errors})
 
 
 class TestValueRangeValidation:
     """Testes para validação de ranges de valores."""
     
-    def test_exec_event_valid_ranges(self):
-        """Testa ExecEvent com valores válidos."""
-        events = [
-            ExecEvent(
-                timestamp=datetime(2024, 1, 15, 10, 0, 0),
-                task_id="task1",
-                mode="FULL",
-                rate=85,
-                size=120
-            )
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert len(report.errors) == 0
-    
-    def test_exec_event_missing_rate_for_full(self):
-        """Testa que ExecEvent FULL sem rate é erro (validação adicional)."""
-        events = [
-            ExecEvent(
-                timestamp=datetime(2024, 1, 15, 10, 0, 0),
-                task_id="task1",
-                mode="FREE",  # FREE permite rate=None
-                rate=None,
-                size=100
-            )
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-    
     def test_exec_event_negative_size(self):
         """Testa que Pydantic rejeita size <= 0."""
         from pydantic import ValidationError as PydanticValidationError
         
-        with pytest.raises(PydanticValidationError) as exc_info:
+        with pytest.raises(PydanticValidationError, match=r"(?i)size"):
             ExecEvent(
-                timestamp=datetime(2024, 1, 15, 10, 0, 0),
+                timestamp=_BASE_TIME,
                 task_id="task1",
                 mode="FULL",
                 rate=80,
                 size=0  # Zero não deveria passar (gt=0)
             )
-        
-        assert "size" in str(exc_info.value).lower()
-    
-    def test_self_event_low_rate_warning(self):
-        """Testa que rate baixo em SelfEvent gera warning."""
-        events = [
-            SelfEvent(
-                timestamp=datetime(2024, 1, 15, 10, 0, 0),
-                task_id="task1",
-                rate=30,  # Rate < 50%
-                autonomy=8,
-                study_minutes=60
-            )
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True  # Warning não bloqueia
-        assert len(report.warnings) >= 1
-        assert any(w.error_type == "VALUE_WARNING" for w in report.warnings)
-    
-    def test_self_event_low_autonomy_no_help_warning(self):
-        """Testa warning para baixa autonomia sem ajuda reportada."""
-        events = [
-            SelfEvent(
-                timestamp=datetime(2024, 1, 15, 10, 0, 0),
-                task_id="task1",
-                rate=80,
-                autonomy=2,  # Autonomia muito baixa
-                study_minutes=60
-            )
-        ]
-        
-        validator = EventValidator()
-        report = validator.validate(events)
-        
-        assert report.is_valid is True
-        assert len(report.warnings) >= 1
-        assert any(w.error_type == "CONSISTENCY_WARNING" for w in report.warnings)
 
 
 class TestValidatorConfiguration:
@@ -284,46 +190,21 @@ class TestValidatorConfiguration:
     
     def test_disable_timestamp_check(self):
         """Testa desabilitar validação de timestamps."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time + timedelta(minutes=5), task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=90, size=100),  # Volta no tempo
-        ]
-        
-        validator = EventValidator(check_timestamps=False)
-        report = validator.validate(events)
+        report = _validator(check_timestamps=False).validate(list(BACKWARDS_TIME))
         
         # Não deve detectar erro de timestamp
         assert all(e.error_type != "TIMESTAMP_ORDER" for e in report.errors)
     
     def test_disable_duplicate_check(self):
         """Testa desabilitar detecção de duplicatas."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
-        events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),  # Duplicata
-        ]
-        
-        validator = EventValidator(check_duplicates=False)
-        report = validator.validate(events)
+        report = _validator(check_duplicates=False).validate(list(EXACT_DUPLICATE))
         
         # Não deve detectar duplicata
         assert all(e.error_type != "DUPLICATE" for e in report.errors)
     
     def test_disable_value_range_check(self):
         """Testa desabilitar validação de ranges."""
-        events = [
-            SelfEvent(
-                timestamp=datetime(2024, 1, 15, 10, 0, 0),
-                task_id="task1",
-                rate=30,  # Baixo, geraria warning
-                autonomy=2,
-                study_minutes=60
-            )
-        ]
-        
-        validator = EventValidator(check_value_ranges=False)
-        report = validator.validate(events)
+        report = _validator(check_value_ranges=False).validate(list(LOW_RATE_LOW_AUTONOMY_SELF))  # Geraria warnings
         
         # Não deve gerar warnings de valor
         assert all(w.error_type not in ["VALUE_WARNING", "CONSISTENCY_WARNING"] for w in report.warnings)
@@ -332,29 +213,26 @@ class TestValidatorConfiguration:
 class TestValidationWithMixedEvents:
     """Testes com múltiplos tipos de eventos."""
     
-    def test_complex_validation_scenario(self):
+    def test_complex_validation_scenario(self, default_validator):
         """Testa cenário complexo com múltiplos erros e warnings."""
-        base_time = datetime(2024, 1, 15, 10, 0, 0)
         events = [
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),
-            ExecEvent(timestamp=base_time + timedelta(minutes=1), task_id="task1", mode="FULL", rate=90, size=100),
-            ExecEvent(timestamp=base_time, task_id="task1", mode="FULL", rate=80, size=100),  # Duplicata
-            MoveEvent(timestamp=base_time - timedelta(minutes=1), task_id="task2", action="PICK"),  # Timestamp retroativo
-            SelfEvent(timestamp=base_time + timedelta(minutes=10), task_id="task1", rate=30, autonomy=2, study_minutes=60),  # Warnings
+            ExecEvent(timestamp=_BASE_TIME, task_id="task1", mode="FULL", rate=80, size=100),
+            ExecEvent(timestamp=_BASE_TIME + timedelta(minutes=1), task_id="task1", mode="FULL", rate=90, size=100),
+            ExecEvent(timestamp=_BASE_TIME, task_id="task1", mode="FULL", rate=80, size=100),  # Duplicata
+            MoveEvent(timestamp=_BASE_TIME - timedelta(minutes=1), task_id="task2", action="PICK"),  # Timestamp retroativo
+            SelfEvent(timestamp=_BASE_TIME + timedelta(minutes=10), task_id="task1", rate=30, autonomy=2, study_minutes=60),  # Warnings
         ]
         
-        validator = EventValidator()
-        report = validator.validate(events)
+        report = default_validator.validate(events)
         
         assert report.total_events == 5
         assert not report.is_valid
         assert len(report.errors) >= 2
         assert len(report.warnings) >= 1
     
-    def test_empty_event_list(self):
+    def test_empty_event_list(self, default_validator):
         """Testa validação de lista vazia."""
-        validator = EventValidator()
-        report = validator.validate([])
+        report = default_validator.validate([])
         
         assert report.total_events == 0
         assert report.is_valid is True
@@ -0,0 +1,162 @@
+"""
+Testes para a thread escritora (WriterThread).
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.etl.connection import get_connection, WAL_CHECKPOINT_MIN_ROWS
+from src.etl.init_db import init_database
+from src.etl.writer import WriterThread, WriterError
+
+_INSERT_SQL = (
+    "INSERT OR IGNORE INTO validation_errors (id, source_file, error_type, error_message) "
+    "VALUES (?, 'f', 'T', 'm')"
+)
+
+
+def _close_or_fail(writer, timeout=5.0):
+    """Chama writer.close() em outra thread; falha se não retornar a tempo."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["changes"] = writer.close()
+        except BaseException as e:
+            outcome["error"] = e
+
+    closer = threading.Thread(target=target, daemon=True)
+    closer.start()
+    closer.join(timeout)
+    assert not closer.is_alive(), "close() não retornou"
+    assert not writer.is_alive()
+    return outcome
+
+
+def _count(db_uri):
+    return get_connection(db_uri).execute("SELECT COUNT(*) FROM validation_errors").fetchone()[0]
+
+
+class TestWriterThread:
+    """Testes de WriterThread."""
+
+    def test_batches_committed_on_close(self, mem_db_uri):
+        """Testa que todos os batches são gravados e confirmados."""
+        writer = WriterThread(mem_db_uri)
+        writer.start()
+        writer.submit(_INSERT_SQL, [(str(i),) for i in range(10)])
+        writer.submit(_INSERT_SQL, ((str(i),) for i in range(10, 25)))
+
+        assert writer.close() == 25
+        assert not writer.is_alive()
+        assert _count(mem_db_uri) == 25
+
+    def test_changes_exclude_ignored_rows(self, mem_db_uri):
+        """Testa que linhas ignoradas (duplicatas) não entram em changes."""
+        writer = WriterThread(mem_db_uri)
+        writer.start()
+        writer.submit(_INSERT_SQL, [("a",), ("a",), ("b",)])
+
+        assert writer.close() == 2
+        assert writer.changes_by_sql[_INSERT_SQL] == 2
+
+    def test_abort_rolls_back(self, mem_db_uri):
+        """Testa que abort() desfaz os batches já executados."""
+        writer = WriterThread(mem_db_uri)
+        writer.start()
+        writer.submit(_INSERT_SQL, [("a",)])
+        writer.abort()
+
+        assert _count(mem_db_uri) == 0
+
+    def test_error_raised_on_close_and_rolled_back(self, mem_db_uri):
+        """Testa que erro de banco na thread é relançado e nada é gravado."""
+        writer = WriterThread(mem_db_uri)
+        writer.start()
+        writer.submit(_INSERT_SQL, [("a",)])
+        writer.submit("INSERT INTO missing_table VALUES (?)", [(1,)])
+
+        with pytest.raises(sqlite3.Error):
+            writer.close()
+        assert _count(mem_db_uri) == 0
+
+    def test_commit_failure_raised_from_close(self, mem_db_uri):
+        """Testa que falha no COMMIT (FK adiada) é relançada e close() retorna."""
+        conn = get_connection(mem_db_uri)
+        conn.execute("CREATE TABLE parent (id TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE child (id TEXT, parent_id TEXT REFERENCES parent(id) "
+            "DEFERRABLE INITIALLY DEFERRED)"
+        )
+        conn.commit()
+
+        writer = WriterThread(mem_db_uri, pragmas=("PRAGMA foreign_keys = ON",))
+        writer.start()
+        writer.submit("INSERT INTO child VALUES (?, ?)", [("c1", "missing")])
+
+        outcome = _close_or_fail(writer)
+        assert isinstance(outcome.get("error"), sqlite3.IntegrityError)
+        assert conn.execute("SELECT COUNT(*) FROM child").fetchone()[0] == 0
+
+    def test_non_sqlite_error_mid_batch(self, mem_db_uri):
+        """Testa que erro não-sqlite no meio de um batch chega a close() como WriterError."""
+        def rows():
+            yield ("a",)
+            raise ValueError("linha inválida")
+
+        writer = WriterThread(mem_db_uri)
+        writer.start()
+        writer.submit(_INSERT_SQL, rows())
+
+        outcome = _close_or_fail(writer)
+        assert isinstance(outcome.get("error"), WriterError)
+        assert isinstance(outcome["error"].__cause__, ValueError)
+        assert _count(mem_db_uri) == 0
+
+    def test_submit_after_failure_does_not_block(self, mem_db_uri):
+        """Testa que, após uma falha, submit() relança em vez de bloquear na fila."""
+        writer = WriterThread(mem_db_uri, max_pending=1)
+        writer.start()
+        writer.submit(_INSERT_SQL, [(1, 2)])  # Número errado de parâmetros
+
+        # A thread continua esvaziando a fila após a falha, então os submits
+        # nunca bloqueiam; o erro aparece assim que a thread o registra
+        with pytest.raises(sqlite3.Error):
+            for _ in range(100_000):
+                writer.submit(_INSERT_SQL, [("b",)])
+        writer.abort()
+        assert not writer.is_alive()
+
+
+class TestWriterThreadWal:
+    """Testes de WriterThread em um banco WAL criado por init_database()."""
+
+    @pytest.fixture
+    def wal_db(self, tmp_path):
+        db_path = tmp_path / "wal.db"
+        init_database(str(db_path))
+        return db_path
+
+    def test_immediate_transaction_and_wal_checkpoint(self, wal_db):
+        """Testa o lock do BEGIN IMMEDIATE, leituras concorrentes e o checkpoint pós-carga."""
+        rows = WAL_CHECKPOINT_MIN_ROWS + 1
+        writer = WriterThread(wal_db, max_pending=1)
+        writer.start()
+        # Com max_pending=1 o segundo submit só retorna depois que a thread
+        # consumiu o primeiro batch, ou seja, já com o BEGIN IMMEDIATE feito
+        writer.submit(_INSERT_SQL, [(str(i),) for i in range(rows - 1)])
+        writer.submit(_INSERT_SQL, [(str(rows - 1),)])
+
+        # Enquanto a transação está aberta: outra conexão lê, mas não escreve
+        other = sqlite3.connect(wal_db, timeout=0)
+        assert other.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert other.execute("SELECT COUNT(*) FROM validation_errors").fetchone()[0] == 0
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("DELETE FROM validation_errors")
+        other.close()
+
+        assert writer.close() == rows
+        assert _count(wal_db) == rows
+        assert (wal_db.parent / "wal.db-wal").stat().st_size == 0
@@ -2,57 +2,75 @@
 Testes para XESExporter.
 """
 
+import hashlib
+import shutil
+import sqlite3
 import pytest
 from datetime import datetime, timedelta
 from pathlib import Path
-from xml.etree import ElementTree as ET
-
-from src.models.events import ExecEvent, MoveEvent, SelfEvent
+from src.models.events import ExecEvent, MoveEvent
 from src.etl.loader import SQLiteLoader
-from src.etl.init_db import init_database
 from src.exporters import XESExporter, XESExportError, export_to_xes
 
+pytestmark = pytest.mark.xdist_group("xes_exporter")
 
-@pytest.fixture
-def temp_db(tmp_path):
-    """Cria banco temporário com eventos para testes."""
-    db_path = tmp_path / "test_xes.db"
-    init_database(str(db_path))
+XES_NS = {'xes': 'http://www.xes-standard.org/'}
+
+# lxml (opcional) permite XPath pré-compilado; sem ele, usa ElementTree da stdlib
+try:
+    from lxml import etree as ET
+    
+    _XP_STRING = ET.XPath("./xes:string[@key=$k]", namespaces=XES_NS)
+    
+    def _string_attr(elem, key):
+        """Retorna o atributo <string key=...> filho de elem (ou None)."""
+        found = _XP_STRING(elem, k=key)
+        return found[0] if found else None
+except ImportError:
+    from xml.etree import ElementTree as ET
     
-    # Cria eventos de exemplo
-    base_time = datetime(2024, 1, 15, 10, 0, 0)
-    events = [
-        MoveEvent(timestamp=base_time, task_id="calc", action="PICK"),
-        ExecEvent(
-            timestamp=base_time + timedelta(minutes=5),
-            task_id="calc",
-            mode="FULL",
-            rate=50,
-            size=80
-        ),
-        ExecEvent(
-            timestamp=base_time + timedelta(minutes=10),
-            task_id="calc",
-            mode="FULL",
-            rate=100,
-            size=90
-        ),
-        SelfEvent(
-            timestamp=base_time + timedelta(minutes=15),
-            task_id="calc",
-            rate=100,
-            autonomy=9
-        ),
-    ]
+    def _string_attr(elem, key):
+        """Retorna o atributo <string key=...> filho de elem (ou None)."""
+        return elem.find(f"xes:string[@key='{key}']", XES_NS)
+
+
+# Linhas de events equivalentes às que SQLiteLoader.load_events gravaria para
+# 4 eventos de "calc" (MOVE PICK, 2x EXEC FULL, SELF) do student_test/case_test
+_STUDENT_HASH = hashlib.sha256(b"student_test").hexdigest()
+_SEED_ROWS = (
+    ("evt_xes_0001", "case_test", _STUDENT_HASH, "calc", "task_navigation", "MoveEvent",
+     "2024-01-15T10:00:00", None, "session_test", '{"version": 1, "action": "PICK"}'),
+    ("evt_xes_0002", "case_test", _STUDENT_HASH, "calc", "test_execution", "ExecEvent",
+     "2024-01-15T10:05:00", None, "session_test",
+     '{"version": 1, "mode": "FULL", "rate": 50, "size": 80, "error": "NONE"}'),
+    ("evt_xes_0003", "case_test", _STUDENT_HASH, "calc", "test_execution", "ExecEvent",
+     "2024-01-15T10:10:00", None, "session_test",
+     '{"version": 1, "mode": "FULL", "rate": 100, "size": 90, "error": "NONE"}'),
+    ("evt_xes_0004", "case_test", _STUDENT_HASH, "calc", "self_assessment", "SelfEvent",
+     "2024-01-15T10:15:00", None, "session_test",
+     '{"version": 1, "rate": 100, "autonomy": 9, "help_sources": {}, "has_help": false, '
+     '"study_minutes": null}'),
+)
+
+
+@pytest.fixture(scope="module")
+def temp_db(empty_db_template, tmp_path_factory):
+    """Cria banco com eventos para testes (compartilhado no módulo, somente leitura)."""
+    db_path = tmp_path_factory.mktemp("xes") / "test_xes.db"
+    shutil.copyfile(empty_db_template, db_path)
     
-    # Carrega no banco
-    loader = SQLiteLoader(str(db_path))
-    loader.load_events(
-        events,
-        student_id="student_test",
-        case_id="case_test",
-        session_id="session_test"
-    )
+    # Semeia direto com um único executemany (o carregamento via SQLiteLoader
+    # é exercitado em TestMultipleTraces)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO events (
+            id, case_id, student_hash, task_id, activity,
+            event_type, timestamp, duration_seconds,
+            session_id, metadata
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, _SEED_ROWS)
+    conn.commit()
+    conn.close()
     
     return str(db_path)
 
@@ -63,6 +81,49 @@ def temp_output(tmp_path):
     return str(tmp_path / "output.xes")
 
 
+@pytest.fixture(scope="module")
+def exported_xes(temp_db, tmp_path_factory):
+    """Exporta temp_db uma única vez e retorna (stats, raiz do XML parseado)."""
+    output_path = tmp_path_factory.mktemp("xes_out") / "output.xes"
+    stats = XESExporter().export_from_db(temp_db, str(output_path))
+    return stats, ET.parse(str(output_path)).getroot()
+
+
+@pytest.fixture(scope="module")
+def xes_summary(exported_xes):
+    """Resumo estrutural do XES exportado, coletado em uma única passada."""
+    _, root = exported_xes
+    summary = {
+        "ext_prefixes": [],
+        "classifier_names": set(),
+        "global_event_count": 0,
+        "global_event_keys": set(),
+        "trace_count": 0,
+        "event_count": 0,
+    }
+    for elem in root.iter():
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if tag == 'extension':
+            summary["ext_prefixes"].append(elem.get('prefix'))
+        elif tag == 'classifier':
+            summary["classifier_names"].add(elem.get('name'))
+        elif tag == 'global' and elem.get('scope') == 'event':
+            summary["global_event_count"] += 1
+            summary["global_event_keys"].update(child.get('key') for child in elem)
+        elif tag == 'trace':
+            summary["trace_count"] += 1
+        elif tag == 'event':
+            summary["event_count"] += 1
+    return summary
+
+
+@pytest.fixture(scope="module")
+def first_trace(exported_xes):
+    """Primeiro <trace> do XES exportado (compartilhado pelos testes de trace)."""
+    _, root = exported_xes
+    return root.find('xes:trace', XES_NS)
+
+
 @pytest.fixture
 def exporter():
     """Cria instância do exportador."""
@@ -114,6 +175,14 @@ class TestXESExportFromDB:
                 case_id="nonexistent"
             )
     
+    def test_load_events_streams_rows(self, exporter, temp_db):
+        """Testa que os eventos são lidos sob demanda, já agrupáveis em traces."""
+        rows = exporter._load_events_from_db(str(temp_db), None, None)
+        
+        assert not isinstance(rows, list)
+        traces = exporter._group_events_into_traces(rows)
+        assert sum(map(len, traces.values())) == 4
+    
     def test_export_creates_directory(self, exporter, temp_db, tmp_path):
         """Testa que diretório é criado se não existir."""
         nested_path = tmp_path / "subdir" / "output.xes"
@@ -127,15 +196,9 @@ class TestXESExportFromDB:
 class TestXESStructure:
     """Testes da estrutura XML XES."""
     
-    # Namespace XES
-    XES_NS = {'xes': 'http://www.xes-standard.org/'}
-    
-    def test_xes_root_attributes(self, exporter, temp_db, temp_output):
+    def test_xes_root_attributes(self, exported_xes):
         """Testa atributos do elemento raiz."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
+        _, root = exported_xes
         
         # Remove namespace do tag para comparação
         assert root.tag.split('}')[-1] == 'log'
@@ -144,50 +207,24 @@ class TestXESStructure:
         # Verifica que o namespace está presente no tag
         assert 'http://www.xes-standard.org/' in root.tag
     
-    def test_xes_has_extensions(self, exporter, temp_db, temp_output):
+    def test_xes_has_extensions(self, xes_summary):
         """Testa presença de extensões XES."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        # Busca com namespace
-        extensions = root.findall('xes:extension', self.XES_NS)
-        assert len(extensions) == 4
-        
-        prefixes = {ext.get('prefix') for ext in extensions}
-        assert 'concept' in prefixes
-        assert 'time' in prefixes
-        assert 'org' in prefixes
-        assert 'lifecycle' in prefixes
+        prefixes = xes_summary["ext_prefixes"]
+        assert len(prefixes) == 4
+        assert {'concept', 'time', 'org', 'lifecycle'} <= set(prefixes)
     
-    def test_xes_has_classifiers(self, exporter, temp_db, temp_output):
+    def test_xes_has_classifiers(self, xes_summary):
         """Testa presença de classificadores."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        classifiers = root.findall('xes:classifier', self.XES_NS)
-        assert len(classifiers) >= 2
-        
-        names = {c.get('name') for c in classifiers}
+        names = xes_summary["classifier_names"]
+        assert len(names) >= 2
         assert 'Activity' in names
         assert 'Resource' in names
     
-    def test_xes_has_global_attributes(self, exporter, temp_db, temp_output):
-        """Testa atributos globais."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
+    def test_xes_has_global_attributes(self, xes_summary):
+        """Testa atributos globais de evento."""
+        assert xes_summary["global_event_count"] >= 1
         
-        global_elems = root.findall('xes:global[@scope="event"]', self.XES_NS)
-        assert len(global_elems) >= 1
-        
-        # Verifica atributos globais de evento
-        global_event = global_elems[0]
-        attrs = {child.get('key') for child in global_event}
+        attrs = xes_summary["global_event_keys"]
         assert 'concept:name' in attrs
         assert 'time:timestamp' in attrs
         assert 'org:resource' in attrs
@@ -197,136 +234,96 @@ class TestXESStructure:
 class TestXESTraces:
     """Testes de traces."""
     
-    XES_NS = {'xes': 'http://www.xes-standard.org/'}
-    
-    def test_trace_created(self, exporter, temp_db, temp_output):
+    def test_trace_created(self, xes_summary):
         """Testa criação de trace."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        traces = root.findall('xes:trace', self.XES_NS)
-        assert len(traces) == 1
+        assert xes_summary["trace_count"] == 1
     
-    def test_trace_has_name(self, exporter, temp_db, temp_output):
+    def test_trace_has_name(self, first_trace):
         """Testa que trace tem concept:name."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        trace = root.find('xes:trace', self.XES_NS)
-        name_elem = trace.find("xes:string[@key='concept:name']", self.XES_NS)
+        name_elem = _string_attr(first_trace, 'concept:name')
         
         assert name_elem is not None
         assert 'case_test_calc' in name_elem.get('value')
     
-    def test_trace_has_custom_attributes(self, exporter, temp_db, temp_output):
+    def test_trace_has_custom_attributes(self, first_trace):
         """Testa atributos customizados do trace."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        trace = root.find('xes:trace', self.XES_NS)
-        
-        case_elem = trace.find("xes:string[@key='tko:case_id']", self.XES_NS)
+        case_elem = _string_attr(first_trace, 'tko:case_id')
         assert case_elem is not None
         assert case_elem.get('value') == 'case_test'
         
-        task_elem = trace.find("xes:string[@key='tko:task_id']", self.XES_NS)
+        task_elem = _string_attr(first_trace, 'tko:task_id')
         assert task_elem is not None
         assert task_elem.get('value') == 'calc'
         
-        student_elem = trace.find("xes:string[@key='tko:student_hash']", self.XES_NS)
+        student_elem = _string_attr(first_trace, 'tko:student_hash')
         assert student_elem is not None
 
 
 class TestXESEvents:
     """Testes de eventos."""
     
-    XES_NS = {'xes': 'http://www.xes-standard.org/'}
-    
-    def test_events_created(self, exporter, temp_db, temp_output):
-        """Testa criação de eventos."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        trace = root.find('xes:trace', self.XES_NS)
-        events = trace.findall('xes:event', self.XES_NS)
-        
-        assert len(events) == 4
+    def test_events_created(self, xes_summary):
+        """Testa criação de eventos (um único trace)."""
+        assert xes_summary["event_count"] == 4
     
-    def test_event_has_required_attributes(self, exporter, temp_db, temp_output):
+    def test_event_has_required_attributes(self, exported_xes):
         """Testa atributos obrigatórios do evento."""
-        exporter.export_from_db(temp_db, temp_output)
-        
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
+        _, root = exported_xes
         
-        trace = root.find('xes:trace', self.XES_NS)
-        event = trace.find('xes:event', self.XES_NS)
+        trace = root.find('xes:trace', XES_NS)
+        event = trace.find('xes:event', XES_NS)
         
         # concept:name
-        name_elem = event.find("xes:string[@key='concept:name']", self.XES_NS)
+        name_elem = _string_attr(event, 'concept:name')
         assert name_elem is not None
         
         # time:timestamp
-        time_elem = event.find("xes:date[@key='time:timestamp']", self.XES_NS)
+        time_elem = event.find("xes:date[@key='time:timestamp']", XES_NS)
         assert time_elem is not None
         timestamp_value = time_elem.get('value')
         assert 'T' in timestamp_value  # ISO 8601 format
         assert '+00:00' in timestamp_value  # Timezone
         
         # org:resource
-        resource_elem = event.find("xes:string[@key='org:resource']", self.XES_NS)
+        resource_elem = _string_attr(event, 'org:resource')
         assert resource_elem is not None
         
         # lifecycle:transition
-        lifecycle_elem = event.find("xes:string[@key='lifecycle:transition']", self.XES_NS)
+        lifecycle_elem = _string_attr(event, 'lifecycle:transition')
         assert lifecycle_elem is not None
         assert lifecycle_elem.get('value') == 'complete'
     
-    def test_event_has_custom_attributes(self, exporter, temp_db, temp_output):
+    def test_event_has_custom_attributes(self, exported_xes):
         """Testa atributos customizados do evento."""
-        exporter.export_from_db(temp_db, temp_output)
+        _, root = exported_xes
         
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        trace = root.find('xes:trace', self.XES_NS)
-        event = trace.find('xes:event', self.XES_NS)
+        trace = root.find('xes:trace', XES_NS)
+        event = trace.find('xes:event', XES_NS)
         
         # tko:event_type
-        type_elem = event.find("xes:string[@key='tko:event_type']", self.XES_NS)
+        type_elem = _string_attr(event, 'tko:event_type')
         assert type_elem is not None
         assert type_elem.get('value') in ['ExecEvent', 'MoveEvent', 'SelfEvent']
         
         # tko:event_id
-        id_elem = event.find("xes:string[@key='tko:event_id']", self.XES_NS)
+        id_elem = _string_attr(event, 'tko:event_id')
         assert id_elem is not None
         
         # tko:session_id
-        session_elem = event.find("xes:string[@key='tko:session_id']", self.XES_NS)
+        session_elem = _string_attr(event, 'tko:session_id')
         assert session_elem is not None
         assert session_elem.get('value') == 'session_test'
     
-    def test_event_metadata_as_json(self, exporter, temp_db, temp_output):
+    def test_event_metadata_as_json(self, exported_xes):
         """Testa que metadata é exportado como JSON string."""
-        exporter.export_from_db(temp_db, temp_output)
+        _, root = exported_xes
         
-        tree = ET.parse(temp_output)
-        root = tree.getroot()
-        
-        trace = root.find('xes:trace', self.XES_NS)
-        events = trace.findall('xes:event', self.XES_NS)
+        trace = root.find('xes:trace', XES_NS)
+        events = trace.findall('xes:event', XES_NS)
         
         # Procura evento com metadata (ExecEvent)
         for event in events:
-            metadata_elem = event.find("xes:string[@key='tko:metadata']", self.XES_NS)
+            metadata_elem = _string_attr(event, 'tko:metadata')
             if metadata_elem is not None:
                 import json
                 # Verifica que é JSON válido
@@ -365,12 +362,10 @@ class TestHelperFunction:
 class TestMultipleTraces:
     """Testes com múltiplos traces."""
     
-    XES_NS = {'xes': 'http://www.xes-standard.org/'}
-    
-    def test_multiple_tasks_create_multiple_traces(self, tmp_path):
+    def test_multiple_tasks_create_multiple_traces(self, empty_db_template, tmp_path):
         """Testa que tarefas diferentes criam traces diferentes."""
         db_path = tmp_path / "multi_trace.db"
-        init_database(str(db_path))
+        shutil.copyfile(empty_db_template, db_path)
         
         base_time = datetime(2024, 1, 15, 10, 0, 0)
         
@@ -413,7 +408,7 @@ class TestMultipleTraces:
         # Verifica XML
         tree = ET.parse(str(output_path))
         root = tree.getroot()
-        traces = root.findall('xes:trace', self.XES_NS)
+        traces = root.findall('xes:trace', XES_NS)
         assert len(traces) == 2
 
 
@@ -432,8 +427,10 @@ class TestXMLValidity:
         """Testa que arquivo usa encoding UTF-8."""
         exporter.export_from_db(temp_db, temp_output)
         
-        content = Path(temp_output).read_bytes()
+        # A declaração XML fica no início: basta ler o cabeçalho
+        with open(temp_output, 'rb') as f:
+            header = f.read(128)
         
         # Verifica declaração XML
-        assert b'<?xml' in content
-        assert b'UTF-8' in content or b'utf-8' in content
+        assert header.startswith(b'<?xml')
+        assert b'UTF-8' in header or b'utf-8' in header